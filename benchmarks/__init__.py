@@ -0,0 +1,4 @@
+import os
+
+# Suppress the pyLCR banner in the benchmark output
+os.environ.setdefault('PYLCR_QUIET', '1')
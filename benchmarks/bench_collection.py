@@ -0,0 +1,93 @@
+import itertools
+
+import pyLCR
+
+from .common import makeLightCurve
+
+##########################################################################################
+
+class CollectionSuite():
+    """
+    Building and analysing a catalog-wide collection of daily light curves
+
+    """
+
+    def setup(self):
+        self.lightCurves = [makeLightCurve('daily', seed=seed, source=source) for seed, source in enumerate(pyLCR.sources[:100])]
+        self.collection = pyLCR.LightCurveCollection(self.lightCurves)
+
+        met = self.collection.met
+        self.tmin = met[len(met) // 2]
+        self.tmax = met[len(met) // 2 + 30]
+
+    def time_build(self):
+        pyLCR.LightCurveCollection(self.lightCurves)
+
+    def peakmem_build(self):
+        pyLCR.LightCurveCollection(self.lightCurves)
+
+    def time_catalog_flux(self):
+        self.collection.catalog_flux()
+
+    def time_fractional_variability(self):
+        self.collection.fractional_variability()
+
+    def time_flaring_sources(self):
+        self.collection.flaring_sources(self.tmin, self.tmax)
+
+
+class VariabilitySuite():
+    """
+    Characterizing the variability of a single daily light curve
+
+    """
+
+    def setup(self):
+        self.lightCurve = makeLightCurve('daily')
+
+    def time_bayesian_blocks(self):
+        self.lightCurve.bayesian_blocks()
+
+    def time_find_flares(self):
+        self.lightCurve.find_flares()
+
+    def time_fractional_variability(self):
+        self.lightCurve.fractional_variability()
+
+    def time_doubling_times(self):
+        self.lightCurve.doubling_times()
+
+    def time_lomb_scargle(self):
+        self.lightCurve.lomb_scargle()
+
+
+class PeriodogramSuite():
+    """
+    Searching a set of daily light curves for periodicity in a single process
+
+    """
+
+    def setup(self):
+        self.lightCurves = [makeLightCurve('daily', seed=seed, source=source) for seed, source in enumerate(pyLCR.sources[:20])]
+
+    def time_compute_periodograms(self):
+        pyLCR.computePeriodograms(self.lightCurves, processes=1)
+
+
+class CorrelationSuite():
+    """
+    Cross-correlating daily light curves within a year of lag
+
+    """
+
+    def setup(self):
+        self.lightCurves = [makeLightCurve('daily', seed=seed, source=source) for seed, source in enumerate(pyLCR.sources[:6])]
+
+    def time_dcf(self):
+        self.lightCurves[0].cross_correlate(self.lightCurves[1], max_lag=365)
+
+    def time_zdcf(self):
+        self.lightCurves[0].cross_correlate(self.lightCurves[1], max_lag=365, method='zdcf')
+
+    def time_compute_cross_correlations(self):
+        pyLCR.computeCrossCorrelations(itertools.combinations(self.lightCurves, 2), processes=1, max_lag=365)
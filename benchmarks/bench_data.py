@@ -0,0 +1,144 @@
+import json
+import shutil
+import tempfile
+
+import pyLCR
+from pyLCR import DataTools
+from pyLCR import CacheTools
+from pyLCR.MockTools import MockRepository
+from pyLCR.MockTools import generateLightCurveData
+from pyLCR.NetworkTools import chunk_size
+from pyLCR.StreamTools import ArrayStreamDecoder
+
+from .common import cadences
+from .common import makeLightCurve
+
+##########################################################################################
+
+class DecodeSuite():
+    """
+    Decoding and converting repository responses of each cadence
+
+    """
+
+    params = cadences
+    param_names = ['cadence']
+
+    def setup(self, cadence):
+        self.payload = generateLightCurveData(cadence=cadence)
+        self.data = DataTools._decode(self.payload)
+        self.chunks = [self.payload[index:index+chunk_size] for index in range(0, len(self.payload), chunk_size)]
+
+    def _stream_decode(self):
+        decoder = ArrayStreamDecoder()
+        for chunk in self.chunks:
+            decoder.feed(chunk)
+        return decoder.close()
+
+    def time_stream_decode(self, cadence):
+        self._stream_decode()
+
+    def time_json_decode(self, cadence):
+        json.loads(self.payload)
+
+    def time_parse(self, cadence):
+        DataTools._parseLightCurve(self.data)
+
+    def time_stream_decode_and_parse(self, cadence):
+        DataTools._parseLightCurve(self._stream_decode())
+
+    def peakmem_stream_decode_and_parse(self, cadence):
+        DataTools._parseLightCurve(self._stream_decode())
+
+    def peakmem_json_decode_and_parse(self, cadence):
+        DataTools._parseLightCurve(json.loads(self.payload))
+
+
+class FetchSuite():
+    """
+    Downloading light curves from a local mock repository, which measures the complete client-side fetch path
+
+    """
+
+    params = cadences
+    param_names = ['cadence']
+
+    # Start the timer once the mock repository has created its responses
+    warmup_time = 0.5
+
+    def setup(self, cadence):
+        self.repository = MockRepository().start()
+        self.url = DataTools.repository_url
+        pyLCR.setRepositoryURL(self.repository.url)
+
+        # Measure the on-disk cache rather than the in-memory cache
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = CacheTools.cache.directory
+        self.memory_size = CacheTools.memory_cache.max_entries
+        pyLCR.setCacheOptions(directory=self.directory, memory_size=0)
+
+        # Create the responses and fill the cache before timing
+        pyLCR.getLightCurve('4FGL J1229.0+0202', cadence=cadence)
+
+    def teardown(self, cadence):
+        pyLCR.setRepositoryURL(self.url)
+        pyLCR.setCacheOptions(directory=self.cache_directory, memory_size=self.memory_size)
+        self.repository.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_getLightCurve(self, cadence):
+        pyLCR.getLightCurve('4FGL J1229.0+0202', cadence=cadence, use_cache=False)
+
+    def time_getLightCurve_cached(self, cadence):
+        pyLCR.getLightCurve('4FGL J1229.0+0202', cadence=cadence)
+
+
+class BatchFetchSuite():
+    """
+    Downloading many light curves concurrently from a local mock repository
+
+    """
+
+    timeout = 300
+
+    def setup(self):
+        self.sources = pyLCR.sources[:50]
+
+        self.repository = MockRepository().start()
+        self.url = DataTools.repository_url
+        pyLCR.setRepositoryURL(self.repository.url)
+
+        # Create the responses before timing
+        pyLCR.getLightCurves(self.sources, cadence='weekly', rate_limit=None, use_cache=False)
+
+    def teardown(self):
+        pyLCR.setRepositoryURL(self.url)
+        self.repository.stop()
+
+    def time_getLightCurves(self):
+        pyLCR.getLightCurves(self.sources, cadence='weekly', rate_limit=None, use_cache=False)
+
+
+class StorageSuite():
+    """
+    Saving and loading light curves in the binary format
+
+    """
+
+    params = ['npz', 'directory']
+    param_names = ['format']
+
+    def setup(self, format):
+        self.lightCurve = makeLightCurve('daily')
+        self.directory = tempfile.mkdtemp()
+        self.path = self.directory + ('/light_curve.npz' if format == 'npz' else '/light_curve')
+        self.lightCurve.save(self.path)
+
+    def teardown(self, format):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_save(self, format):
+        self.lightCurve.save(self.path)
+
+    def time_load(self, format):
+        pyLCR.LightCurve.load(self.path)
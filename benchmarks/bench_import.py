@@ -0,0 +1,20 @@
+class ImportSuite():
+    """
+    Importing pyLCR in a fresh interpreter without a display, which must not import matplotlib or the
+    mock repository server
+
+    """
+
+    def timeraw_import_pyLCR(self):
+        return """
+import os
+import sys
+
+os.environ['PYLCR_QUIET'] = '1'
+os.environ['MPLBACKEND'] = 'Agg'
+
+import pyLCR
+
+assert 'matplotlib' not in sys.modules, 'importing pyLCR imported matplotlib'
+assert 'http.server' not in sys.modules, 'importing pyLCR imported the mock repository server'
+"""
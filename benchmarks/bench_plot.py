@@ -0,0 +1,48 @@
+import shutil
+import tempfile
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pyLCR
+import matplotlib.pylab as plot
+
+from .common import makeLightCurve
+
+##########################################################################################
+
+class PlotSuite():
+    """
+    Drawing a daily light curve with and without the TS and photon index panes
+
+    """
+
+    params = [[False, True], [False, True], [False, True]]
+    param_names = ['plotTS', 'plotIndex', 'decimate']
+
+    def setup(self, plotTS, plotIndex, decimate):
+        self.lightCurve = makeLightCurve('daily')
+
+    def time_plotLightCurve(self, plotTS, plotIndex, decimate):
+        figure, ax = pyLCR.plotLightCurve(self.lightCurve, showPlot=False, plotTS=plotTS, plotIndex=plotIndex, decimate=decimate)
+        figure.canvas.draw()
+        plot.close(figure)
+
+
+class RenderSuite():
+    """
+    Rendering the plots of many light curves in a process pool
+
+    """
+
+    timeout = 300
+
+    def setup(self):
+        self.lightCurves = [makeLightCurve('weekly', seed=seed, source=source) for seed, source in enumerate(pyLCR.sources[:8])]
+        self.directory = tempfile.mkdtemp()
+
+    def teardown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_renderLightCurves(self):
+        pyLCR.renderLightCurves(self.lightCurves, directory=self.directory, processes=2, plotTS=True)
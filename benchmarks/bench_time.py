@@ -0,0 +1,29 @@
+from pyLCR import computeMJD
+from pyLCR import computeMJDs
+from pyLCR import computeDates
+
+from .common import cadences
+from .common import makeLightCurve
+
+##########################################################################################
+
+class TimeConversionSuite():
+    """
+    Converting the METs of complete light curves into MJDs and dates
+
+    """
+
+    params = cadences
+    param_names = ['cadence']
+
+    def setup(self, cadence):
+        self.met = makeLightCurve(cadence).met
+
+    def time_computeMJD(self, cadence):
+        [computeMJD(met) for met in self.met]
+
+    def time_computeMJDs(self, cadence):
+        computeMJDs(self.met)
+
+    def time_computeDates(self, cadence):
+        computeDates(self.met)
@@ -0,0 +1,26 @@
+import json
+
+from pyLCR.MockTools import generateLightCurveData
+from pyLCR.DataTools import _parseLightCurve
+
+##########################################################################################
+
+# The cadences benchmarked by each suite, each generated at a realistic size
+cadences = ['daily', 'weekly', 'monthly']
+
+##########################################################################################
+
+def makeLightCurve(cadence='daily', seed=0, source='4FGL J1229.0+0202'):
+    """Create a synthetic LightCurve object without going through the network
+
+    """
+
+    lightCurve = _parseLightCurve(json.loads(generateLightCurveData(cadence=cadence, seed=seed)))
+
+    lightCurve.source = source
+    lightCurve.cadence = cadence
+    lightCurve.flux_type = 'photon'
+    lightCurve.index_type = 'fixed'
+    lightCurve.ts_min = 4
+
+    return lightCurve
@@ -0,0 +1,283 @@
+import numpy
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from .DataTools import LightCurve
+from .DataTools import dense_dtype
+
+##########################################################################################
+
+# The table columns holding the metadata of each light curve, stored with dictionary encoding
+metadata_columns = ['source', 'cadence', 'flux_type', 'index_type']
+
+# The table columns holding the per-bin values, in the order of the dense light curve layout
+value_columns = ['met', 'bin_id', 'ts', 'detected', 'flux', 'flux_error_lower', 'flux_error_upper', 'flux_upper_limit',
+    'photon_index', 'photon_index_interval', 'fit_tolerance', 'fit_convergence', 'dlogl', 'EG', 'GAL']
+
+# The default number of rows in each Parquet row group, about 50 daily light curves
+default_row_group_size = 262_144
+
+##########################################################################################
+
+def _requirePyarrow():
+    """Raise an ImportError if pyarrow isn't installed
+
+    """
+
+    if pyarrow is None:
+        raise ImportError("pyarrow is required to export light curves to Arrow and Parquet. Install it with 'pip install pyarrow'")
+
+##########################################################################################
+
+def _dictionaryColumn(values, counts):
+    """Create a dictionary encoded column that repeats each value counts times
+
+    """
+
+    labels = list(dict.fromkeys(values))
+    codes = {label: code for code, label in enumerate(labels)}
+
+    indices = numpy.repeat(numpy.array([codes[value] for value in values], dtype=numpy.int32), counts)
+
+    return pyarrow.DictionaryArray.from_arrays(pyarrow.array(indices), pyarrow.array(labels, type=pyarrow.string()))
+
+##########################################################################################
+
+def _concatenate(arrays):
+    """Concatenate arrays, without copying a single array
+
+    """
+
+    if len(arrays) == 1:
+        return numpy.ascontiguousarray(arrays[0])
+
+    return numpy.concatenate(arrays)
+
+##########################################################################################
+
+def toArrowTable(lightCurves):
+    """Convert one or more light curves into an Arrow table with one row per time bin
+
+    The per-bin values of a single light curve are passed to Arrow without copying when their numpy arrays are
+    contiguous, e.g. after LightCurve.load. Detected quantities are null in the bins with an upper limit and
+    the upper limit is null in the bins with a detection.
+
+    Arguments:
+        lightCurves (list):     A LightCurve object, a list of LightCurve objects, or a dictionary of LightCurve objects
+
+    Returns:
+        A pyarrow Table with the columns source, cadence, flux_type, index_type, ts_min, met, bin_id, ts, detected, flux,
+        flux_error_lower, flux_error_upper, flux_upper_limit, photon_index, photon_index_interval, fit_tolerance,
+        fit_convergence, dlogl, EG and GAL
+
+    """
+
+    _requirePyarrow()
+
+    if isinstance(lightCurves, LightCurve):
+        lightCurves = [lightCurves]
+    elif isinstance(lightCurves, dict):
+        lightCurves = list(lightCurves.values())
+
+    lightCurves = [lightCurve for lightCurve in lightCurves if lightCurve is not None]
+
+    counts = [len(lightCurve.met) for lightCurve in lightCurves]
+    denses = [lightCurve.to_dense() for lightCurve in lightCurves]
+
+    columns = {}
+
+    for field in metadata_columns:
+        columns[field] = _dictionaryColumn([getattr(lightCurve, field) for lightCurve in lightCurves], counts)
+
+    ts_min = [lightCurve.ts_min if lightCurve.ts_min is not None else numpy.nan for lightCurve in lightCurves]
+    columns['ts_min'] = pyarrow.array(numpy.repeat(numpy.array(ts_min, dtype=numpy.float64), counts))
+
+    # Take the per-bin quantities directly from the light curves and the aligned detections from the dense layout
+    for field in ['met', 'bin_id', 'ts']:
+        columns[field] = pyarrow.array(_concatenate([getattr(lightCurve, field) for lightCurve in lightCurves] or [numpy.array([], dense_dtype[field])]))
+
+    dense = numpy.concatenate(denses) if len(denses) > 0 else numpy.empty(0, dtype=dense_dtype)
+
+    columns['detected'] = pyarrow.array(dense['detected'])
+
+    for field, values in [('flux', dense['flux']), ('flux_error_lower', dense['flux_error'][:,0]), ('flux_error_upper', dense['flux_error'][:,1]),
+            ('flux_upper_limit', dense['flux_upper_limit']), ('photon_index', dense['photon_index']), ('photon_index_interval', dense['photon_index_interval'])]:
+        columns[field] = pyarrow.array(values, from_pandas=True)
+
+    for field in ['fit_tolerance', 'fit_convergence', 'dlogl', 'EG', 'GAL']:
+        columns[field] = pyarrow.array(_concatenate([getattr(lightCurve, field) for lightCurve in lightCurves] or [numpy.array([], dense_dtype[field])]))
+
+    return pyarrow.table(columns)
+
+##########################################################################################
+
+def _codes(column, labels):
+    """Return an integer code for each row of a string or dictionary encoded column, using a dictionary of labels that is shared between calls
+
+    """
+
+    codes = []
+
+    for chunk in column.chunks:
+        if not pyarrow.types.is_dictionary(chunk.type):
+            chunk = pyarrow.compute.dictionary_encode(chunk)
+
+        mapping = numpy.array([labels.setdefault(label, len(labels)) for label in chunk.dictionary.to_pylist()] + [labels.setdefault(None, len(labels))])
+
+        # Null entries are mapped onto the last code
+        indices = chunk.indices.fill_null(len(mapping) - 1).to_numpy()
+        codes.append(mapping[indices])
+
+    return numpy.concatenate(codes) if len(codes) > 0 else numpy.array([], dtype=numpy.int64)
+
+##########################################################################################
+
+def fromArrowTable(table):
+    """Convert an Arrow table created by toArrowTable, or a filtered subset of its rows, back into light curves
+
+    Arguments:
+        table (Obj):            A pyarrow Table
+
+    Returns:
+        A dictionary of LightCurve objects keyed by source name. If the table holds several light curves of the
+        same source, e.g. with different cadences, the dictionary is keyed by (source, cadence, flux_type, index_type, ts_min).
+
+    """
+
+    _requirePyarrow()
+
+    n_rows = table.num_rows
+
+    # Label each row with the light curve it belongs to
+    labels = {}
+    group = numpy.zeros(n_rows, dtype=numpy.int64)
+    for field in metadata_columns:
+        codes = _codes(table.column(field), labels)
+        group = group * (len(labels) + 1) + codes
+
+    ts_min = table.column('ts_min').to_numpy()
+    ts_min_values, ts_min_codes = numpy.unique(ts_min, return_inverse=True)
+    group = group * max(len(ts_min_values), 1) + ts_min_codes.reshape(-1)
+
+    # Convert the values into a dense array ordered by light curve and time
+    met = table.column('met').to_numpy()
+    order = numpy.lexsort((met, group))
+
+    dense = numpy.empty(n_rows, dtype=dense_dtype)
+    for field in ['met', 'bin_id', 'ts', 'detected', 'flux', 'flux_upper_limit', 'photon_index', 'photon_index_interval',
+            'fit_tolerance', 'fit_convergence', 'dlogl', 'EG', 'GAL']:
+        dense[field] = table.column(field).to_numpy(zero_copy_only=False)[order]
+    dense['flux_error'][:,0] = table.column('flux_error_lower').to_numpy(zero_copy_only=False)[order]
+    dense['flux_error'][:,1] = table.column('flux_error_upper').to_numpy(zero_copy_only=False)[order]
+
+    group = group[order]
+    starts = numpy.concatenate([[0], numpy.flatnonzero(numpy.diff(group)) + 1]) if n_rows > 0 else numpy.array([], dtype=numpy.int64)
+    stops = numpy.append(starts[1:], n_rows)
+
+    metadata = {field: table.column(field).take(pyarrow.array(order[starts])).to_pylist() for field in metadata_columns}
+    metadata['ts_min'] = ts_min[order[starts]]
+
+    lightCurves = []
+    for index, (start, stop) in enumerate(zip(starts, stops)):
+
+        ts_min = metadata['ts_min'][index]
+        if numpy.isnan(ts_min):
+            ts_min = None
+        elif float(ts_min).is_integer():
+            ts_min = int(ts_min)
+
+        lightCurves.append(LightCurve.from_dense(dense[start:stop], source=metadata['source'][index], cadence=metadata['cadence'][index],
+            flux_type=metadata['flux_type'][index], index_type=metadata['index_type'][index], ts_min=ts_min))
+
+    sources = [lightCurve.source for lightCurve in lightCurves]
+    if len(set(sources)) == len(sources):
+        return dict(zip(sources, lightCurves))
+
+    return {(lightCurve.source, lightCurve.cadence, lightCurve.flux_type, lightCurve.index_type, lightCurve.ts_min): lightCurve for lightCurve in lightCurves}
+
+##########################################################################################
+
+def writeParquet(lightCurves, path, row_group_size=default_row_group_size):
+    """Write one or more light curves to a Parquet file with one row per time bin
+
+    The rows are ordered by source and time, so the statistics of each row group allow readParquet to skip
+    the row groups that don't contain the requested sources or time range.
+
+    Arguments:
+        lightCurves (list):     A LightCurve object, a list of LightCurve objects, or a dictionary of LightCurve objects
+        path (str):             The output filename
+        row_group_size (int):   The maximum number of rows in each row group. Default = 262144
+
+    Returns:
+        None
+
+    """
+
+    _requirePyarrow()
+
+    if isinstance(lightCurves, LightCurve):
+        lightCurves = [lightCurves]
+    elif isinstance(lightCurves, dict):
+        lightCurves = list(lightCurves.values())
+
+    lightCurves = sorted([lightCurve for lightCurve in lightCurves if lightCurve is not None], key=lambda lightCurve: str(lightCurve.source))
+
+    pyarrow.parquet.write_table(toArrowTable(lightCurves), path, row_group_size=row_group_size)
+
+##########################################################################################
+
+def readParquetTable(path, columns=None, sources=None, tmin=None, tmax=None):
+    """Read the rows of a Parquet file written by writeParquet, with optional column projection and row filtering
+
+    Arguments:
+        path (str):             The Parquet filename
+        columns (list):         The columns to read. Default = None, which reads every column
+        sources (list):         Only read the rows of these sources. Default = None
+        tmin (float):           Only read the rows with an MET greater than or equal to tmin. Default = None
+        tmax (float):           Only read the rows with an MET less than or equal to tmax. Default = None
+
+    Returns:
+        A pyarrow Table
+
+    """
+
+    _requirePyarrow()
+
+    filters = []
+
+    if sources is not None:
+        filters.append(('source', 'in', list(sources)))
+
+    if tmin is not None:
+        filters.append(('met', '>=', tmin))
+
+    if tmax is not None:
+        filters.append(('met', '<=', tmax))
+
+    return pyarrow.parquet.read_table(path, columns=columns, filters=filters or None)
+
+##########################################################################################
+
+def readParquet(path, sources=None, tmin=None, tmax=None):
+    """Read light curves from a Parquet file written by writeParquet, skipping the row groups that don't contain
+    the requested sources or time range
+
+    Arguments:
+        path (str):             The Parquet filename
+        sources (list):         Only read the light curves of these sources. Default = None
+        tmin (float):           Only read the bins with an MET greater than or equal to tmin. Default = None
+        tmax (float):           Only read the bins with an MET less than or equal to tmax. Default = None
+
+    Returns:
+        A dictionary of LightCurve objects, see fromArrowTable
+
+    """
+
+    return fromArrowTable(readParquetTable(path, sources=sources, tmin=tmin, tmax=tmax))
+
+##########################################################################################
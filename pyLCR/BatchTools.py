@@ -0,0 +1,74 @@
+import os
+import multiprocessing
+
+from .DataTools import LightCurve
+
+##########################################################################################
+
+def _loadItem(item):
+    """Return the light curve of a batch item, loading paths written by LightCurve.save as memory-mapped light curves
+    and returning any other item unchanged
+
+    """
+
+    if isinstance(item, str):
+        return LightCurve.load(item, mmap_mode='r')
+
+    return item
+
+##########################################################################################
+
+def _callWorker(job):
+    """Call a batch worker with a single task, returning the error message instead of raising
+
+    """
+
+    worker, index, task = job
+
+    try:
+        return index, worker(task), None
+    except Exception as e:
+        return index, None, str(e)
+
+##########################################################################################
+
+def _runBatch(worker, tasks, processes=None, maxtasksperchild=None):
+    """Call a worker function with each of a list of tasks, in the current process or in a pool of processes
+
+    Arguments:
+        worker (function):          A module level function taking a single task as its argument
+        tasks (list):               The tasks
+        processes (int):            The number of processes, with 1 calling the worker in the current process. Default = the number of CPUs
+        maxtasksperchild (int):     The number of tasks after which each process is replaced. Default = None
+
+    Returns:
+        A list with a (result, error) tuple for each task, in the order of the tasks, where the error is the message of the
+        exception raised by the worker, or None if it succeeded
+
+    """
+
+    jobs = [(worker, index, task) for index, task in enumerate(tasks)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    outcomes = [None] * len(jobs)
+
+    if processes == 1:
+        results = map(_callWorker, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes, maxtasksperchild=maxtasksperchild)
+        results = pool.imap_unordered(_callWorker, jobs, chunksize=4)
+
+    try:
+        for index, result, error in results:
+            outcomes[index] = (result, error)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return outcomes
+
+##########################################################################################
@@ -0,0 +1,458 @@
+import os
+import re
+import time
+import tempfile
+import threading
+import collections
+import concurrent.futures
+
+from stat import S_ISREG
+
+##########################################################################################
+
+# The default location of the on-disk light curve cache
+default_directory = os.environ.get('PYLCR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.pyLCR', 'cache'))
+
+# The number of seconds a cached light curve remains valid for each cadence. Daily bins
+# are added every day, while the monthly light curves change only rarely.
+default_ttl = {'daily': 43_200, 'weekly': 172_800, 'monthly': 604_800}
+
+# The maximum total size of the cache in bytes
+default_max_size = 500 * 1024**2
+
+# The maximum number of light curves kept in memory
+default_memory_size = 64
+
+# The names of the cache entries, i.e. source_cadence_fluxtype_indextype_tsminN.json, and of the temporary files of unfinished entries
+entry_pattern = re.compile(r'^.+_(daily|weekly|monthly)_[^_]+_[^_]+_tsmin[^_]+\.json$')
+temporary_prefix = '.tmp_'
+
+# The age in seconds after which a temporary file is assumed to have been left behind by a writer that crashed
+stale_temporary_age = 3600
+
+##########################################################################################
+
+class LightCurveCache():
+    """
+    A size-bounded, on-disk cache of the raw light curve data returned by the repository.
+    Entries expire after a cadence dependent time-to-live and the least recently used
+    entries are evicted once the total size of the cache exceeds max_size. Files are
+    written atomically, so a single cache directory can be shared between processes.
+
+    """
+
+    def __init__(self, directory=default_directory, ttl=None, max_size=default_max_size, enabled=True):
+        self.directory = directory
+        self.ttl = dict(default_ttl)
+        if ttl is not None:
+            self.ttl.update(ttl)
+        self.max_size = max_size
+        self.enabled = enabled
+
+    def get_path(self, filename):
+        """
+        Return the full path of a cache entry
+
+        """
+
+        return os.path.join(self.directory, filename)
+
+    def lookup(self, filename, cadence):
+        """
+        Return the path of the cache entry for the given filename, or None if the entry doesn't exist or has expired
+
+        Arguments:
+            filename (str):         The cache filename created by getLightCurve
+            cadence (str):          The light curve cadence, used to select the time-to-live
+
+        Returns:
+            The path of the cache entry, or None
+
+        """
+
+        if self.enabled == False:
+            return None
+
+        path = self.get_path(filename)
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        # Check whether the entry has expired
+        now = time.time()
+        if now - stat.st_mtime > self.ttl.get(cadence, 0):
+            return None
+
+        try:
+            # Record the access time for the LRU eviction, leaving the modification time intact
+            os.utime(path, (now, stat.st_mtime))
+        except FileNotFoundError:  # The entry was evicted by another process
+            return None
+
+        return path
+
+    def get(self, filename, cadence):
+        """
+        Return the cached data for the given filename, or None if the entry doesn't exist or has expired
+
+        Arguments:
+            filename (str):         The cache filename created by getLightCurve
+            cadence (str):          The light curve cadence, used to select the time-to-live
+
+        Returns:
+            The cached data as bytes, or None
+
+        """
+
+        path = self.lookup(filename, cadence)
+
+        if path is None:
+            return None
+
+        try:
+            with open(path, 'rb') as file:
+                return file.read()
+        except FileNotFoundError:  # The entry was evicted by another process
+            return None
+
+    def open(self, filename):
+        """
+        Return a CacheWriter that adds an entry to the cache once it's committed, or None if the cache is disabled
+
+        Arguments:
+            filename (str):         The cache filename created by getLightCurve
+
+        Returns:
+            A CacheWriter object or None
+
+        """
+
+        if self.enabled == False:
+            return None
+
+        return CacheWriter(self, filename)
+
+    def put(self, filename, data):
+        """
+        Atomically write data to the cache and evict old entries if the cache is too large
+
+        Arguments:
+            filename (str):         The cache filename created by getLightCurve
+            data (bytes):           The raw data to store
+
+        Returns:
+            None
+
+        """
+
+        writer = self.open(filename)
+
+        if writer is None:
+            return
+
+        try:
+            writer.write(data)
+            writer.commit()
+        finally:
+            writer.abort()
+
+    def _list_entries(self):
+        """
+        Return the name and stat result of each regular file in the cache directory that is a cache entry, removing
+        any stale temporary files along the way. Other files in the directory are never listed.
+
+        """
+
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        now = time.time()
+
+        for name in names:
+            is_temporary = name.startswith(temporary_prefix)
+            if not is_temporary and entry_pattern.match(name) is None:
+                continue
+
+            # Skip directories, links and anything else that isn't a regular file
+            try:
+                status = os.lstat(self.get_path(name))
+            except FileNotFoundError:
+                continue
+
+            if not S_ISREG(status.st_mode):
+                continue
+
+            # Remove the temporary files of writers that never finished
+            if is_temporary:
+                if now - status.st_mtime > stale_temporary_age:
+                    try:
+                        os.remove(self.get_path(name))
+                    except FileNotFoundError:
+                        pass
+                continue
+
+            entries.append((name, status))
+
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the total size of the cache is below max_size
+
+        """
+
+        if self.max_size is None:
+            return
+
+        entries = [(status.st_atime, status.st_size, name) for name, status in self._list_entries()]
+        total_size = sum(size for atime, size, name in entries)
+
+        if total_size <= self.max_size:
+            return
+
+        # Remove the least recently used entries first
+        for atime, size, name in sorted(entries):
+            try:
+                os.remove(self.get_path(name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+
+    def clear(self):
+        """
+        Remove all entries from the cache, leaving any other files in the cache directory untouched
+
+        """
+
+        for name, status in self._list_entries():
+            try:
+                os.remove(self.get_path(name))
+            except FileNotFoundError:
+                pass
+
+
+class CacheWriter():
+    """
+    Writes a cache entry to a temporary file in the cache directory, which is moved into place when the
+    entry is committed. Entries that are never committed are removed by abort.
+
+    """
+
+    def __init__(self, cache, filename):
+        self.cache = cache
+        self.filename = filename
+        self.committed = False
+
+        os.makedirs(cache.directory, exist_ok=True)
+
+        handle, self.tmp_path = tempfile.mkstemp(dir=cache.directory, prefix=temporary_prefix)
+        self.file = os.fdopen(handle, 'wb')
+
+    def write(self, data):
+        """
+        Append data to the entry
+
+        """
+
+        self.file.write(data)
+
+    def read(self):
+        """
+        Return the data written so far
+
+        """
+
+        self.file.flush()
+
+        with open(self.tmp_path, 'rb') as file:
+            return file.read()
+
+    def reset(self):
+        """
+        Discard the data written so far
+
+        """
+
+        self.file.seek(0)
+        self.file.truncate()
+
+    def commit(self):
+        """
+        Atomically move the entry into the cache and evict old entries if the cache is too large
+
+        """
+
+        self.file.close()
+        os.replace(self.tmp_path, self.cache.get_path(self.filename))
+        self.committed = True
+
+        self.cache.evict()
+
+    def abort(self):
+        """
+        Remove the temporary file of an entry that hasn't been committed
+
+        """
+
+        if self.committed == True:
+            return
+
+        self.file.close()
+
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class MemoryCache():
+    """
+    A thread-safe, in-memory LRU cache of recently retrieved light curves that also coalesces concurrent
+    requests. When several threads request the same key at once, only the first performs the fetch and
+    the others wait for its result, or its exception. Entries expire with the same cadence dependent
+    time-to-live as the on-disk cache.
+
+    """
+
+    def __init__(self, max_entries=default_memory_size, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl if ttl is not None else dict(default_ttl)
+
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        self.in_flight = {}
+
+    def get(self, key, cadence, fetch):
+        """
+        Return the value stored for a key, waiting for an in-flight fetch of the same key if there is one,
+        or call fetch and store its result
+
+        Arguments:
+            key (tuple):            The key identifying the value
+            cadence (str):          The light curve cadence, used to select the time-to-live
+            fetch (function):       A function without arguments that returns the value and the time at which the value was
+                                    created, e.g. the modification time of an on-disk cache entry, from which the entry expires
+
+        Returns:
+            The value and a string describing where it came from, either 'memory', 'coalesced' or 'fetched'
+
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is not None:
+                stored, value = entry
+                if time.time() - stored <= self.ttl.get(cadence, 0):
+                    self.entries.move_to_end(key)
+                    return value, 'memory'
+                del self.entries[key]
+
+            future = self.in_flight.get(key)
+            owner = future is None
+
+            if owner == True:
+                future = concurrent.futures.Future()
+                self.in_flight[key] = future
+
+        if owner == False:
+            return future.result(), 'coalesced'
+
+        try:
+            value, stored = fetch()
+
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.in_flight[key]
+
+            # Don't keep values that have already expired
+            if time.time() - stored <= self.ttl.get(cadence, 0):
+                self.entries[key] = (stored, value)
+                self.entries.move_to_end(key)
+
+        self.evict()
+        future.set_result(value)
+
+        return value, 'fetched'
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache holds at most max_entries
+
+        """
+
+        with self.lock:
+            while len(self.entries) > max(self.max_entries, 0):
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries from the cache
+
+        """
+
+        with self.lock:
+            self.entries.clear()
+
+
+# The caches shared by all calls to getLightCurve
+cache = LightCurveCache()
+memory_cache = MemoryCache(ttl=cache.ttl)
+
+##########################################################################################
+
+def setCacheOptions(directory=None, ttl=None, max_size=None, enabled=None, memory_size=None):
+    """Configure the on-disk and in-memory light curve caches
+
+    Arguments:
+        directory (str):        The directory in which to store cached light curves. Default = ~/.pyLCR/cache
+        ttl (dict):             The time-to-live in seconds for each cadence, e.g. {'daily': 3600}
+        max_size (int):         The maximum total size of the on-disk cache in bytes
+        enabled (BOOL):         Enables or disables the on-disk cache
+        memory_size (int):      The maximum number of light curves kept in memory, or 0 to disable the in-memory cache. Default = 64
+
+    Returns:
+        None
+
+    """
+
+    if directory is not None:
+        cache.directory = directory
+
+    if ttl is not None:
+        cache.ttl.update(ttl)
+
+    if max_size is not None:
+        cache.max_size = max_size
+        cache.evict()
+
+    if enabled is not None:
+        cache.enabled = enabled
+
+    if memory_size is not None:
+        memory_cache.max_entries = memory_size
+        memory_cache.evict()
+
+##########################################################################################
+
+def clearCache():
+    """Remove all light curves from the on-disk and in-memory caches
+
+    """
+
+    cache.clear()
+    memory_cache.clear()
+
+##########################################################################################
@@ -0,0 +1,187 @@
+import numpy
+import warnings
+
+from .DataTools import getLightCurves
+from .VariabilityTools import fractionalVariability
+
+##########################################################################################
+
+class LightCurveCollection():
+    """
+    A collection of light curves with the same cadence, flux type and index type, stored as source x bin
+    matrices aligned on bin_id. Bins without a value for a given source are filled with NaN, so catalog-wide
+    statistics reduce to vectorized operations along the source or bin axes.
+
+    """
+
+    def __init__(self, lightCurves):
+
+        # Accept either a dictionary of light curves keyed by source name or a list of light curves
+        if isinstance(lightCurves, dict):
+            lightCurves = list(lightCurves.values())
+
+        lightCurves = [lightCurve for lightCurve in lightCurves if lightCurve is not None]
+
+        self.sources = [lightCurve.source for lightCurve in lightCurves]
+        self.source_index = {source: index for index, source in enumerate(self.sources)}
+
+        self.cadence = lightCurves[0].cadence if len(lightCurves) > 0 else None
+        self.flux_type = lightCurves[0].flux_type if len(lightCurves) > 0 else None
+        self.index_type = lightCurves[0].index_type if len(lightCurves) > 0 else None
+        self.ts_min = lightCurves[0].ts_min if len(lightCurves) > 0 else None
+
+        for lightCurve in lightCurves:
+            if (lightCurve.cadence, lightCurve.flux_type, lightCurve.index_type) != (self.cadence, self.flux_type, self.index_type):
+                raise ValueError("All light curves in a collection must share the same cadence, flux type and index type")
+
+        # Create the common bin axis
+        if len(lightCurves) > 0:
+            self.bin_id = numpy.unique(numpy.concatenate([lightCurve.bin_id for lightCurve in lightCurves]))
+        else:
+            self.bin_id = numpy.array([])
+
+        n_sources = len(self.sources)
+        n_bins = len(self.bin_id)
+
+        self.met = numpy.full(n_bins, numpy.nan)
+        self.ts = numpy.full((n_sources, n_bins), numpy.nan)
+        self.flux = numpy.full((n_sources, n_bins), numpy.nan)
+        self.flux_error = numpy.full((n_sources, n_bins, 2), numpy.nan)
+        self.flux_upper_limits = numpy.full((n_sources, n_bins), numpy.nan)
+        self.photon_index = numpy.full((n_sources, n_bins), numpy.nan)
+        self.detected = numpy.zeros((n_sources, n_bins), dtype=bool)
+
+        for row, lightCurve in enumerate(lightCurves):
+
+            # Find the column of each bin of this light curve
+            columns = numpy.searchsorted(self.bin_id, lightCurve.bin_id)
+
+            # Use the dense layout, in which the detections and upper limits are already aligned with the bins
+            dense = lightCurve.to_dense()
+
+            self.met[columns] = dense['met']
+            self.ts[row, columns] = dense['ts']
+            self.flux[row, columns] = dense['flux']
+            self.flux_error[row, columns] = dense['flux_error']
+            self.photon_index[row, columns] = dense['photon_index']
+            self.flux_upper_limits[row, columns] = dense['flux_upper_limit']
+            self.detected[row, columns] = dense['detected']
+
+    @staticmethod
+    def from_sources(sources=None, cadence='daily', flux_type='photon', index_type='fixed', ts_min=4, **kwargs):
+        """
+        Download the light curves of many sources and pack them into a collection
+
+        Arguments:
+            sources (list):         A list of 4FGL catalog names. Default = None, which requests every source tracked by the LCR
+            cadence (str):          Specifies the requested light curve cadence. Options include: 'daily', 'weekly', and 'monthly'
+            flux_type (str):        Specifies the requested flux type. Options include 'photon' and 'energy'
+            index_type (str):       Specifies the spectral index freedom during fit. Options include 'free' and 'fixed'
+            ts_min (int):           The minimum likelihood ratio test statistic for which a flux estimate is reported as opposed to an upper limit.
+            **kwargs:               Additional keyword arguments passed to getLightCurves
+
+        Returns:
+            A LightCurveCollection and a dictionary of error messages keyed by the name of each source that could not be retrieved
+
+        """
+
+        lightCurves, errors = getLightCurves(sources, cadence=cadence, flux_type=flux_type, index_type=index_type, ts_min=ts_min, **kwargs)
+
+        # Keep the requested source order
+        if sources is not None:
+            lightCurves = [lightCurves[source] for source in sources if source in lightCurves]
+
+        return LightCurveCollection(lightCurves), errors
+
+    def __len__(self):
+        return len(self.sources)
+
+    def get_row(self, source):
+        """
+        Return the row of the collection matrices that holds the given source
+
+        """
+
+        return self.source_index[source]
+
+    def get_window(self, tmin, tmax):
+        """
+        Return the columns of the bins whose MET lies within [tmin, tmax]
+
+        """
+
+        return numpy.where((self.met >= tmin) & (self.met <= tmax))[0]
+
+    def catalog_flux(self):
+        """
+        Return the summed flux of all detected sources in each bin
+
+        """
+
+        return numpy.nansum(self.flux, axis=0)
+
+    def detection_count(self):
+        """
+        Return the number of detected sources in each bin
+
+        """
+
+        return numpy.count_nonzero(self.detected, axis=0)
+
+    def mean_flux(self):
+        """
+        Return the mean detected flux of each source
+
+        """
+
+        # Sources without detections have a NaN mean
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return numpy.nanmean(self.flux, axis=1)
+
+    def fractional_variability(self):
+        """
+        Return the fractional variability amplitude of each source, calculated from its detections
+
+        Returns:
+            An array of fractional variability amplitudes, with NaN for sources with fewer than two detections
+            or whose variance is smaller than the measurement errors
+
+        """
+
+        # Use the symmetric flux error of each detection
+        sigma = (self.flux_error[:,:,1] - self.flux_error[:,:,0]) / 2.0
+
+        return fractionalVariability(self.flux, sigma, axis=1)
+
+    def flaring_sources(self, tmin, tmax, factor=5.0):
+        """
+        Find the sources whose detected flux within a time window exceeds a multiple of their median detected flux
+
+        Arguments:
+            tmin (float):           The start of the time window in MET
+            tmax (float):           The end of the time window in MET
+            factor (float):         The multiple of the median flux that defines a flare. Default = 5
+
+        Returns:
+            A list of source names, ordered by the ratio of their peak to median flux
+
+        """
+
+        columns = self.get_window(tmin, tmax)
+
+        if len(columns) == 0:
+            return []
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            median = numpy.nanmedian(self.flux, axis=1)
+            peak = numpy.nanmax(numpy.where(self.detected[:, columns], self.flux[:, columns], -numpy.inf), axis=1)
+            ratio = peak / median
+
+        flaring = numpy.where(ratio >= factor)[0]
+        flaring = flaring[numpy.argsort(-ratio[flaring], kind='stable')]
+
+        return [self.sources[row] for row in flaring]
+
+##########################################################################################
@@ -0,0 +1,82 @@
+import numpy
+
+from .DataTools import LightCurve
+from .BatchTools import _loadItem
+from .BatchTools import _runBatch
+
+##########################################################################################
+
+def _correlationWorker(task):
+    """Calculate the cross-correlation of a single pair of light curves in a batch process
+
+    """
+
+    first, second, kwargs = task
+
+    # Light curves can be passed as LightCurve objects or as paths written by LightCurve.save
+    first = _loadItem(first)
+    second = _loadItem(second)
+
+    lag, correlation, bounds, n_pairs = first.cross_correlate(second, **kwargs)
+
+    # External series don't have a source name
+    result = {'sources': (first.source, second.source if isinstance(second, LightCurve) else None),
+              'lag': lag,
+              'correlation': correlation,
+              'bounds': bounds,
+              'n_pairs': n_pairs}
+
+    # Summarize the strongest correlation
+    if numpy.all(numpy.isnan(correlation)):
+        result['peak_lag'] = numpy.nan
+        result['peak_correlation'] = numpy.nan
+    else:
+        peak = numpy.nanargmax(correlation)
+        result['peak_lag'] = lag[peak]
+        result['peak_correlation'] = correlation[peak]
+
+    return result
+
+##########################################################################################
+
+def computeCrossCorrelations(pairs, processes=None, **kwargs):
+    """Calculate the discrete cross-correlation functions of many pairs of light curves using a pool of processes,
+    e.g. for a catalog-wide lag survey
+
+    Arguments:
+        pairs (list):               A list of (first, second) tuples, or a dictionary of them keyed by any name, where each is a LightCurve
+                                    object or a path written by LightCurve.save, and the second can also be an external series of
+                                    measurements accepted by LightCurve.cross_correlate
+        processes (int):            The number of processes, with 1 calculating in the current process. Default = the number of CPUs
+        **kwargs:                   Additional options accepted by LightCurve.cross_correlate, e.g. max_lag, lag_width, method
+
+    Returns:
+        A dictionary of results and a dictionary of error messages for the pairs that could not be analyzed, both keyed by the
+        dictionary key of each pair, or by its position if a list is given. Each result is a dictionary holding the 'sources' of
+        the pair, with None for an external series, the 'lag' in days, 'correlation', 'bounds' and 'n_pairs' arrays, and the
+        'peak_lag' and 'peak_correlation' of the strongest correlation.
+
+    """
+
+    # Name each pair by its dictionary key or by its position in the list
+    if isinstance(pairs, dict):
+        items = list(pairs.items())
+    else:
+        items = list(enumerate(pairs))
+
+    items = [(name, pair) for name, pair in items if pair[0] is not None and pair[1] is not None]
+
+    tasks = [(first, second, kwargs) for name, (first, second) in items]
+
+    correlations = {}
+    errors = {}
+
+    for (name, pair), (result, error) in zip(items, _runBatch(_correlationWorker, tasks, processes)):
+        if error is None:
+            correlations[name] = result
+        else:
+            errors[name] = error
+
+    return correlations, errors
+
+##########################################################################################
@@ -1,11 +1,62 @@
 import os
-import urllib
+import copy
+import time
+import urllib.parse
 import json
 import numpy
 import io
 import sys
+import concurrent.futures
+import itertools
 
-from .Sources import sources
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .Sources import catalog
+from .CacheTools import cache
+from .CacheTools import memory_cache
+from .NetworkTools import session
+from .NetworkTools import NetworkError
+from .NetworkTools import RateLimiter
+from .NetworkTools import chunk_size
+from .StreamTools import ArrayStreamDecoder
+from .TimeTools import computeMET
+from .TimeTools import cadence_seconds
+from .EventTools import logger
+from .EventTools import emit
+from . import VariabilityTools
+
+# The LightCurve attributes that are sampled at every time bin, at each detection, and at each upper limit
+bin_fields = ['met', 'ts', 'fit_tolerance', 'fit_convergence', 'dlogl', 'EG', 'GAL', 'bin_id']
+detection_fields = ['met_detections', 'flux', 'flux_error', 'photon_index', 'photon_index_interval']
+upperlimit_fields = ['met_upperlimits', 'flux_upper_limits']
+
+# The address of the repository's query service, which can be pointed at a mirror or a MockRepository
+default_url = 'https://fermi.gsfc.nasa.gov/ssc/data/access/lat/LightCurveRepository/queryDB.php'
+repository_url = os.environ.get('PYLCR_URL', default_url)
+
+# The record type of the dense light curve layout, in which every quantity is aligned on the time bins. Detected
+# quantities are NaN in the bins with an upper limit, and the upper limit is NaN in the bins with a detection.
+dense_dtype = numpy.dtype([('met', numpy.float64),
+                           ('bin_id', numpy.int64),
+                           ('ts', numpy.float64),
+                           ('detected', numpy.bool_),
+                           ('flux', numpy.float64),
+                           ('flux_error', numpy.float64, (2,)),
+                           ('flux_upper_limit', numpy.float64),
+                           ('photon_index', numpy.float64),
+                           ('photon_index_interval', numpy.float64),
+                           ('fit_tolerance', numpy.float64),
+                           ('fit_convergence', numpy.float64),
+                           ('dlogl', numpy.float64),
+                           ('EG', numpy.float64),
+                           ('GAL', numpy.float64)])
+
+# The LightCurve metadata attributes and the version of the binary storage format
+metadata_fields = ['source', 'cadence', 'flux_type', 'index_type', 'ts_min']
+format_version = 1
 
 
 class LightCurve():
@@ -54,46 +105,584 @@ class LightCurve():
         print('Number of upper limits: %s (%.2f%%)' % (len(self.flux_upper_limits), (100*len(self.flux_upper_limits)/len(self.met))))
         print('Number of non-convergant fits: %s (%.2f%%)' % (len(numpy.where(self.fit_convergence != 0)[0]), (100*len(numpy.where(self.fit_convergence != 0)[0])/len(self.met))))
 
+    def save(self, path):
+        """
+        Save the light curve in a columnar binary format. A path ending in '.npz' is written as a
+        single uncompressed npz archive, otherwise path is created as a directory containing one
+        .npy file per array, which can be memory-mapped when loaded.
 
-def getLightCurve(source, cadence='daily', flux_type='photon', index_type='fixed', ts_min=4, verbose=False):
-    """Download data from the light curve repository
+        Arguments:
+            path (str):             The output npz filename or directory
+
+        Returns:
+            None
+
+        """
+
+        metadata = {field: getattr(self, field) for field in metadata_fields}
+        metadata['format_version'] = format_version
+
+        arrays = {field: numpy.asarray(getattr(self, field)) for field in bin_fields + detection_fields + upperlimit_fields}
+
+        if path.endswith('.npz'):
+            numpy.savez(path, __metadata__=numpy.array(json.dumps(metadata)), **arrays)
+            return
+
+        os.makedirs(path, exist_ok=True)
+
+        for field, array in arrays.items():
+            numpy.save(os.path.join(path, field + '.npy'), array)
+
+        # Write the metadata last so that a partially written directory isn't mistaken for a valid one
+        with open(os.path.join(path, 'metadata.json'), 'w') as file:
+            json.dump(metadata, file)
+
+    @staticmethod
+    def load(path, mmap_mode=None):
+        """
+        Load a light curve written by LightCurve.save
+
+        Arguments:
+            path (str):             The npz filename or directory written by LightCurve.save
+            mmap_mode (str):        The numpy memory-map mode used for directories, e.g. 'r'. Default = None
+
+        Returns:
+            A LightCurve object
+
+        """
+
+        lightCurve = LightCurve()
+        fields = bin_fields + detection_fields + upperlimit_fields
+
+        if path.endswith('.npz'):
+            with numpy.load(path) as archive:
+                metadata = json.loads(str(archive['__metadata__']))
+                arrays = {field: archive[field] for field in fields}
+
+        else:
+            with open(os.path.join(path, 'metadata.json')) as file:
+                metadata = json.load(file)
+            arrays = {field: numpy.load(os.path.join(path, field + '.npy'), mmap_mode=mmap_mode) for field in fields}
+
+        if metadata.get('format_version') != format_version:
+            raise ValueError("Unsupported light curve format version: %s" % metadata.get('format_version'))
+
+        for field in fields:
+            setattr(lightCurve, field, arrays[field])
+
+        for field in metadata_fields:
+            setattr(lightCurve, field, metadata[field])
+
+        return lightCurve
+
+    def _get_columns(self, met):
+        """
+        Return the index of the time bin of each of the given METs
+
+        """
+
+        columns = numpy.searchsorted(self.met, met)
+
+        if numpy.any(columns >= len(self.met)) or numpy.any(self.met[numpy.minimum(columns, len(self.met) - 1)] != met):
+            raise ValueError("The detections and upper limits don't match the time bins of the light curve")
+
+        return columns
+
+    def to_dense(self):
+        """
+        Return the light curve as a numpy structured array with one record per time bin, in which the detected
+        fluxes, upper limits and spectral parameters are aligned with the per-bin quantities. The 'detected' field
+        flags the bins with a detection. Fields that don't apply to a bin are NaN, so time windows and cuts on
+        several quantities at once are simple boolean or slice indexing, e.g. dense[(dense['ts'] > 25) & (dense['met'] > t0)].
+
+        Returns:
+            A numpy structured array with one record per time bin
+
+        """
+
+        dense = numpy.empty(len(self.met), dtype=dense_dtype)
+
+        for field in ['met', 'bin_id', 'ts', 'fit_tolerance', 'fit_convergence', 'dlogl', 'EG', 'GAL']:
+            dense[field] = getattr(self, field)
+
+        for field in ['flux', 'flux_error', 'flux_upper_limit', 'photon_index', 'photon_index_interval']:
+            dense[field] = numpy.nan
+
+        # Place the detections and upper limits in their time bins
+        detections = self._get_columns(self.met_detections)
+        upperlimits = self._get_columns(self.met_upperlimits)
+
+        dense['detected'] = False
+        dense['detected'][detections] = True
+
+        dense['flux'][detections] = self.flux
+        dense['flux_error'][detections] = self.flux_error
+        dense['photon_index'][detections] = self.photon_index
+        dense['photon_index_interval'][detections] = self.photon_index_interval
+        dense['flux_upper_limit'][upperlimits] = self.flux_upper_limits
+
+        return dense
+
+    @staticmethod
+    def from_dense(dense, source=None, cadence=None, flux_type=None, index_type=None, ts_min=None):
+        """
+        Create a light curve from a structured array returned by LightCurve.to_dense, e.g. after selecting a subset of its bins
+
+        Arguments:
+            dense (array):          A numpy structured array in the format returned by LightCurve.to_dense
+            source (str):           The source name. Default = None
+            cadence (str):          The light curve cadence. Default = None
+            flux_type (str):        The flux type. Default = None
+            index_type (str):       The spectral index type. Default = None
+            ts_min (int):           The minimum TS for a detection. Default = None
+
+        Returns:
+            A LightCurve object
+
+        """
+
+        lightCurve = LightCurve()
+
+        for field in ['met', 'bin_id', 'ts', 'fit_tolerance', 'fit_convergence', 'dlogl', 'EG', 'GAL']:
+            setattr(lightCurve, field, numpy.ascontiguousarray(dense[field]))
+
+        detected = dense['detected']
+        upperlimits = ~detected & ~numpy.isnan(dense['flux_upper_limit'])
+
+        lightCurve.met_detections = dense['met'][detected]
+        lightCurve.flux = dense['flux'][detected]
+        lightCurve.flux_error = dense['flux_error'][detected]
+        lightCurve.photon_index = dense['photon_index'][detected]
+        lightCurve.photon_index_interval = dense['photon_index_interval'][detected]
+        lightCurve.met_upperlimits = dense['met'][upperlimits]
+        lightCurve.flux_upper_limits = dense['flux_upper_limit'][upperlimits]
+
+        lightCurve.source = source
+        lightCurve.cadence = cadence
+        lightCurve.flux_type = flux_type
+        lightCurve.index_type = index_type
+        lightCurve.ts_min = ts_min
+
+        return lightCurve
+
+    def to_arrow(self):
+        """
+        Return the light curve as a pyarrow Table with one row per time bin. See pyLCR.toArrowTable.
+
+        """
+
+        from .ArrowTools import toArrowTable
+
+        return toArrowTable(self)
+
+    def rethreshold(self, ts_min, n_sigma=1.645):
+        """
+        Create a light curve with a higher minimum detection TS without downloading it again. Detections whose
+        TS falls below the new threshold become upper limits.
+
+        The repository's upper limits are calculated from the likelihood profile, which isn't available locally,
+        so the upper limit of each demoted detection is approximated from its flux and upper flux error as
+        flux + n_sigma * (upper error bound - flux). The default of 1.645 approximates a 95% one-sided limit.
+        Lowering the threshold isn't possible because no flux is reported for upper limits.
+
+        Arguments:
+            ts_min (float):         The new minimum TS for a detection, which must be at least the current ts_min
+            n_sigma (float):        The number of upper flux errors above the flux used for the demoted upper limits. Default = 1.645
+
+        Returns:
+            A new LightCurve object
+
+        """
+
+        if self.ts_min is not None and ts_min < self.ts_min:
+            raise ValueError("The minimum TS can only be raised locally, to no less than the current value of %s" % self.ts_min)
+
+        # Find the TS of each detection
+        detection_ts = self.ts[numpy.searchsorted(self.met, self.met_detections)]
+        keep = detection_ts >= ts_min
+
+        lightCurve = LightCurve()
+
+        for field in bin_fields:
+            setattr(lightCurve, field, getattr(self, field))
+
+        for field in detection_fields:
+            setattr(lightCurve, field, getattr(self, field)[keep])
+
+        # Merge the demoted detections into the upper limits and keep them ordered in time
+        demoted_met = self.met_detections[~keep]
+        demoted_flux = self.flux[~keep]
+        demoted_limits = demoted_flux + n_sigma * (self.flux_error[~keep, 1] - demoted_flux)
+
+        met_upperlimits = numpy.concatenate([self.met_upperlimits, demoted_met])
+        flux_upper_limits = numpy.concatenate([self.flux_upper_limits, demoted_limits])
+
+        order = numpy.argsort(met_upperlimits, kind='stable')
+        lightCurve.met_upperlimits = met_upperlimits[order]
+        lightCurve.flux_upper_limits = flux_upper_limits[order]
+
+        for field in metadata_fields:
+            setattr(lightCurve, field, getattr(self, field))
+
+        lightCurve.ts_min = ts_min
+
+        return lightCurve
+
+    def slice(self, tmin=None, tmax=None, useMJD=False):
+        """
+        Create a light curve containing the time bins whose centers lie between tmin and tmax, inclusive. The bin,
+        detection and upper limit times are in ascending order, so the bounds of the window are found with a
+        binary search and the arrays of the new light curve are views of this light curve's arrays rather than copies.
+
+        Arguments:
+            tmin (float):           The start of the time window. Default = None, which starts at the first bin
+            tmax (float):           The end of the time window. Default = None, which ends at the last bin
+            useMJD (BOOL):          Interpret tmin and tmax as MJDs instead of METs. Default = False
+
+        Returns:
+            A new LightCurve object
+
+        """
+
+        if useMJD == True:
+            tmin = computeMET(tmin) if tmin is not None else None
+            tmax = computeMET(tmax) if tmax is not None else None
+
+        lightCurve = LightCurve()
+
+        # Find the window in each group of fields using its own time array
+        for fields, met in [(bin_fields, self.met), (detection_fields, self.met_detections), (upperlimit_fields, self.met_upperlimits)]:
+            start = numpy.searchsorted(met, tmin, side='left') if tmin is not None else 0
+            stop = numpy.searchsorted(met, tmax, side='right') if tmax is not None else len(met)
+
+            for field in fields:
+                setattr(lightCurve, field, getattr(self, field)[start:stop])
+
+        for field in metadata_fields:
+            setattr(lightCurve, field, getattr(self, field))
+
+        return lightCurve
+
+    def get_flux_sigma(self):
+        """
+        Return the symmetric 1-sigma uncertainty of each detected flux
+
+        """
+
+        return (self.flux_error[:,1] - self.flux_error[:,0]) / 2.0
+
+    def bayesian_blocks(self, p0=0.05):
+        """
+        Segment the detected fluxes into blocks of constant flux using the Bayesian blocks algorithm
+
+        Arguments:
+            p0 (float):             The false alarm probability used to calibrate the prior on the number of blocks. Default = 0.05
+
+        Returns:
+            An array of the n+1 block edges in MET and an array of the mean flux of each of the n blocks
+
+        """
+
+        return VariabilityTools.bayesianBlocks(self.met_detections, self.flux, self.get_flux_sigma(), p0=p0)
+
+    def find_flares(self, window=30, threshold=3.0, min_points=None):
+        """
+        Find the flares during which the detected flux exceeds the median flux of the preceding bins
+
+        Arguments:
+            window (int):           The number of preceding bins used to calculate the quiescent baseline. Default = 30
+            threshold (float):      The significance above the baseline, in units of the lower flux error, that defines a flaring bin. Default = 3
+            min_points (int):       The minimum number of detections in the window required for a baseline. Default = window // 2
+
+        Returns:
+            An (n, 2) array of the MET of the first and last bin of each flare. Consecutive flaring bins form a single flare.
+
+        """
+
+        # Use the detections on the time bin axis, with NaN in the bins with an upper limit
+        dense = self.to_dense()
+
+        flux = dense['flux']
+        sigma = dense['flux'] - dense['flux_error'][:,0]
+
+        flaring, baseline = VariabilityTools.findFlares(flux, sigma, window=window, threshold=threshold, min_points=min_points)
+
+        # Group consecutive flaring bins
+        bins = numpy.flatnonzero(flaring)
+        breaks = numpy.flatnonzero(numpy.diff(bins) != 1) + 1
+        starts = bins[numpy.concatenate([[0], breaks])] if len(bins) > 0 else bins
+        stops = bins[numpy.concatenate([breaks - 1, [len(bins) - 1]])] if len(bins) > 0 else bins
+
+        return numpy.column_stack([self.met[starts], self.met[stops]])
+
+    def fractional_variability(self):
+        """
+        Return the fractional variability amplitude of the detected fluxes
+
+        """
+
+        return float(VariabilityTools.fractionalVariability(self.flux, self.get_flux_sigma()))
+
+    def doubling_times(self, significance=3.0):
+        """
+        Calculate the flux doubling time between each pair of consecutive detections
+
+        Arguments:
+            significance (float):   The minimum significance of the flux difference between the detections. Default = 3
+
+        Returns:
+            An (n, 2) array of [MET, doubling time] rows, with the doubling time in seconds, positive for a rising flux and negative for a decaying flux
+
+        """
+
+        return VariabilityTools.doublingTimes(self.met_detections, self.flux, self.get_flux_sigma(), significance=significance)
+
+    def lomb_scargle(self, minimum_frequency=None, maximum_frequency=None, samples_per_peak=5, upper_limits='ignore', use_errors=True, method='fast'):
+        """
+        Calculate the Lomb-Scargle periodogram of the light curve in O(N log N) time, see VariabilityTools.lombScargle
+
+        Arguments:
+            minimum_frequency (float):  The lowest frequency in 1/day. Default = None, which uses the frequency spacing
+            maximum_frequency (float):  The highest frequency in 1/day. Default = None, which uses half the inverse of the bin width
+            samples_per_peak (int):     The number of frequencies across the width of a periodogram peak. Default = 5
+            upper_limits (str):         The treatment of upper limits. Options include 'ignore', which only uses the detections, and 'half',
+                                        which includes each upper limit as a flux of half the limit with an uncertainty of half the limit. Default = 'ignore'
+            use_errors (BOOL):          Weight the fluxes by their uncertainties. Default = True
+            method (str):               The method used to evaluate the periodogram. Options include 'fast' and 'direct'. Default = 'fast'
+
+        Returns:
+            An array of frequencies in 1/day, an array of the periodogram power at each frequency, and an array of the
+            false alarm probability of a peak with each power
+
+        """
+
+        if upper_limits not in ['ignore', 'half']:
+            raise ValueError("Unknown upper limit treatment: %s" % upper_limits)
+
+        # Measure the times in days
+        t = self.met_detections / 86400.0
+        flux = self.flux
+        sigma = self.get_flux_sigma()
+
+        if upper_limits == 'half':
+            t = numpy.concatenate([t, self.met_upperlimits / 86400.0])
+            flux = numpy.concatenate([flux, self.flux_upper_limits / 2.0])
+            sigma = numpy.concatenate([sigma, self.flux_upper_limits / 2.0])
+
+        if use_errors == False:
+            sigma = None
+
+        if maximum_frequency is None and self.cadence in cadence_seconds:
+            maximum_frequency = 0.5 * 86400.0 / cadence_seconds[self.cadence]
+
+        frequency, power = VariabilityTools.lombScargle(t, flux, sigma, minimum_frequency=minimum_frequency, maximum_frequency=maximum_frequency,
+            samples_per_peak=samples_per_peak, method=method)
+
+        false_alarm = VariabilityTools.falseAlarmProbability(power, t, sigma, maximum_frequency=frequency[-1] if len(frequency) > 0 else None)
+
+        return frequency, power, false_alarm
+
+    def cross_correlate(self, other, max_lag=None, lag_width=None, method='dcf', min_pairs=11, use_errors=True):
+        """
+        Calculate the discrete cross-correlation function between the detected fluxes of this light curve and another
+        light curve or an external series of measurements, see VariabilityTools.discreteCorrelation
+
+        Arguments:
+            other (Obj):                A LightCurve object, or a tuple of arrays (met, flux) or (met, flux, flux_sigma) with the times in MET
+            max_lag (float):            The largest lag in days. Default = None, which uses a quarter of the shorter time span of the two series
+            lag_width (float):          The width of each lag bin in days. Default = None, which uses the bin width of this light curve
+            method (str):               The correlation method. Options include 'dcf' and 'zdcf'. Default = 'dcf'
+            min_pairs (int):            The minimum number of pairs in a lag bin. Default = 11
+            use_errors (BOOL):          Correct the normalization of the 'dcf' method for the measurement errors. Default = True
+
+        Returns:
+            An array of lags in days, where a positive lag means that the other series follows this light curve, an array of
+            the correlation in each lag bin, an (n, 2) array of the lower and upper 1-sigma bounds of each correlation, and an
+            array of the number of pairs in each lag bin
+
+        """
+
+        # Measure the times in days
+        t1 = self.met_detections / 86400.0
+        x1 = self.flux
+        sigma1 = self.get_flux_sigma()
+
+        if isinstance(other, LightCurve):
+            t2 = other.met_detections / 86400.0
+            x2 = other.flux
+            sigma2 = other.get_flux_sigma()
+        else:
+            t2 = numpy.asarray(other[0], dtype=numpy.float64) / 86400.0
+            x2 = other[1]
+            sigma2 = other[2] if len(other) > 2 else None
+
+        if use_errors == False:
+            sigma1 = None
+            sigma2 = None
+
+        if lag_width is None:
+            if self.cadence in cadence_seconds:
+                lag_width = cadence_seconds[self.cadence] / 86400.0
+            else:
+                lag_width = numpy.median(numpy.diff(t1))
+
+        if max_lag is None:
+            spans = [numpy.ptp(t) if len(t) > 0 else 0.0 for t in [t1, t2]]
+            max_lag = max(0.25 * min(spans), lag_width)
+
+        return VariabilityTools.discreteCorrelation(t1, x1, sigma1, t2, x2, sigma2, max_lag, lag_width, method=method, min_pairs=min_pairs)
+
+
+class LCRError(Exception):
+    """
+    An exception raised when a light curve can't be retrieved from the repository
+
+    """
+
+    pass
 
-    Arguments:
-        source (str):           A 4FGL catalog name, e.g. '4FGL J0001.2-0747'
-        cadence (str):          Specifies the requested light curve cadence. Options include: 'daily', 'weekly', and 'monthly'
-        flux_type (str):        Specifies the requested flux type. Options include 'photon' and 'energy'
-        index_type (str):       Specifies the spectral index freedom during fit. Options include 'free' and 'fixed'
-        ts_min (int):           The minimum likelihood ratio test statistic for which a flux estimate is reported as opposed to an upper limit.
+
+class _TeeDecoder():
+    """
+    Passes the raw repository response to a stream decoder and, optionally, to a cache writer. If the
+    response contains values the stream decoder doesn't support, the bytes received so far are kept and
+    the complete response is decoded once it has arrived.
+
+    """
+
+    def __init__(self, writer=None):
+        self.decoder = ArrayStreamDecoder()
+        self.writer = writer
+
+        # The response is read back from the cache writer for the fallback, or otherwise kept here
+        self.chunks = [] if writer is None else None
+
+        # The time spent decoding and the number of decoded bytes, for the instrumentation events
+        self.duration = 0.0
+        self.size = 0
+
+        # Discard anything written by a previous attempt
+        if writer is not None:
+            writer.reset()
+
+    def feed(self, chunk):
+        if self.writer is not None:
+            self.writer.write(chunk)
+        else:
+            self.chunks.append(chunk)
+
+        start = time.perf_counter()
+
+        if self.decoder is not None:
+            try:
+                self.decoder.feed(chunk)
+            except ValueError:
+                self.decoder = None
+
+        self.duration += time.perf_counter() - start
+        self.size += len(chunk)
+
+    def close(self):
+        start = time.perf_counter()
+
+        data = None
+        if self.decoder is not None:
+            try:
+                data = self.decoder.close()
+            except ValueError:
+                self.decoder = None
+
+        # Fall back to decoding the complete response
+        if self.decoder is None:
+            payload = self.writer.read() if self.writer is not None else b''.join(self.chunks)
+            data = _decode(payload)
+
+        self.duration += time.perf_counter() - start
+
+        return data
+
+
+def _downloadData(url, source, verbose=False, rate_limiter=None, writer=None):
+    """Download and decode the light curve data from the repository, streaming the response into numpy arrays
 
     Returns:
-        A key-value pair dictionary containing numpy arrays of light curve data
+        A dictionary of the decoded light curve data
+
+    """
+
+    logger.info("\nDownloading data for %s..." % source)
+
+    if verbose == True:
+        logger.info("")
+        logger.info(url)
+
+    # Keep the decoder of the last attempt to report the decoding time
+    decoders = []
+
+    def createDecoder():
+        decoders.append(_TeeDecoder(writer))
+        return decoders[-1]
+
+    try:
+        data = session.get(url, rate_limiter=rate_limiter, decoder=createDecoder)
+        emit('decode', source=source, duration=decoders[-1].duration, bytes=decoders[-1].size)
+
+    # Parse the status codes of any failures
+    except NetworkError as e:
+        if e.code is not None:
+            raise LCRError("HTTP Error.\nReturn Code %s" % e.code)
+        raise LCRError("Return Code %s" % e.reason)
+
+    logger.info('Done.')
+
+    return data
+
+
+def _readData(path):
+    """Decode the light curve data stored in a cache entry
+
+    """
+
+    with open(path, 'rb') as file:
+
+        decoder = ArrayStreamDecoder()
+
+        try:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                decoder.feed(chunk)
+            return decoder.close()
+
+        except ValueError:
+            file.seek(0)
+            return _decode(file.read())
+
+
+def _fetchData(source, cadence, flux_type, index_type, ts_min, verbose=False, use_cache=True, rate_limiter=None):
+    """Retrieve the decoded light curve data from the cache or the repository, raising an LCRError on failure.
+    Returns the data and the time at which it was downloaded, which is the modification time of a cache entry.
 
     """
 
-    if source not in sources:
-        print("\nError: %s is not a source that is tracked by the LCR." % source)
-        return
+    if source not in catalog:
+        raise LCRError("\nError: %s is not a source that is tracked by the LCR." % source)
 
     if cadence not in ['daily', 'weekly', 'monthly']:
-        print("\nError: Unrecognized cadence.")
-        print("\nThe cadence keyword specifies the requested light curve cadence. Options include: 'daily', 'weekly', and 'monthly'")
-        return 
+        raise LCRError("\nError: Unrecognized cadence.\n"
+            "\nThe cadence keyword specifies the requested light curve cadence. Options include: 'daily', 'weekly', and 'monthly'")
 
     if flux_type not in ['photon', 'energy']:
-        print("\nError: Unrecognized flux type.")
-        print("\nThe flux_type keyword specifies the requested flux type. Options include 'photon' and 'energy'")
-        return
+        raise LCRError("\nError: Unrecognized flux type.\n"
+            "\nThe flux_type keyword specifies the requested flux type. Options include 'photon' and 'energy'")
 
     if index_type not in ['fixed', 'free']:
-        print("\nError: Unrecognized spectral index type.")
-        print("\nThe index_type keyword specifies the spectral index freedom during fit. Options include 'free' and 'fixed'")
-        return
+        raise LCRError("\nError: Unrecognized spectral index type.\n"
+            "\nThe index_type keyword specifies the spectral index freedom during fit. Options include 'free' and 'fixed'")
 
     # Create a quoted source
     source_quoted = urllib.parse.quote(source)
 
     # Create the url template
-    url_template = ("https://fermi.gsfc.nasa.gov/ssc/data/access/lat/LightCurveRepository/queryDB.php?typeOfRequest=lightCurveData"
+    url_template = (repository_url + "?typeOfRequest=lightCurveData"
     "&source_name={source_name}&cadence={cadence}&flux_type={flux_type}&index_type={index_type}&ts_min={ts_min}")
 
     # Fill the url template
@@ -107,105 +696,365 @@ def getLightCurve(source, cadence='daily', flux_type='photon', index_type='fixed
     filename = '_'.join([source_quoted, cadence, flux_type, index_type, "tsmin" + str(ts_min)])
     filename += ".json"
 
-    print("\nDownloading data for %s..." % source)
+    # Check the on-disk cache before going to the network
+    path = None
+    if use_cache == True:
+        path = cache.lookup(filename, cadence)
+
+    if path is not None:
+        start = time.perf_counter()
+        try:
+            timestamp = os.path.getmtime(path)
+            data = _readData(path)
+        except FileNotFoundError:  # The entry was evicted by another process
+            path = None
+
+    if use_cache == True:
+        emit('cache', source=source, cadence=cadence, hit=path is not None, duration=time.perf_counter() - start if path is not None else 0.0)
+
+    if path is None:
+
+        # Write the response to the cache as it's downloaded
+        writer = cache.open(filename) if use_cache == True else None
+
+        try:
+            timestamp = time.time()
+            data = _downloadData(url, source, verbose=verbose, rate_limiter=rate_limiter, writer=writer)
+
+            # Store the downloaded data for subsequent calls
+            if writer is not None and len(data['ts']) > 0:
+                writer.commit()
+
+        finally:
+            if writer is not None:
+                writer.abort()
+
+    if len(data['ts']) == 0:
+        raise LCRError("\nError: No data was returned for %s." % source)
+
+    return data, timestamp
+
+
+def _decode(payload):
+    """Decode the raw json returned by the repository, using orjson if it's available
+
+    """
 
     try:
+        if orjson is not None:
+            return orjson.loads(payload)
 
-        # Open the url
-        with urllib.request.urlopen(url) as response:
+        return json.loads(payload)
 
-            if verbose == True:
-                print("")
-                print(url)
+    except ValueError:
+        raise LCRError("\nError: Unable to decode the data returned by the repository.")
 
-            # Parse the downloaded data
-            data = json.loads(response.read().decode())
 
-            # Check the http status code to see if the data was downloaded successfully
-            code = int(response.code)
-            if code >= 200 and code <= 299 and len(data['ts']) > 0:
-                print('Done.')
+def _columns(rows, width=None):
+    """Convert a list of [met, value, ...] rows into a (len(rows), width) float64 array, or a flat list
+    into a 1D float64 array, in a single pass. Rows of any other width raise an LCRError.
 
-    # Parse the status codes of any failures
-    except urllib.error.HTTPError  as e:
-        print("HTTP Error.")
-        print("Return Code", e.code)
+    """
+
+    shape = (len(rows),) if width is None else (len(rows), width)
+
+    if len(rows) == 0:
+        return numpy.empty(shape)
+
+    # Arrays decoded from a stream only need their shape to be checked
+    if isinstance(rows, numpy.ndarray):
+        values = rows.astype(numpy.float64, copy=False)
+
+    else:
+        try:
+            # fromiter stops after the expected number of values, so the length of every row is checked first
+            if width is not None and numpy.any(numpy.fromiter(map(len, rows), dtype=numpy.int64, count=len(rows)) != width):
+                raise ValueError("Irregular rows")
+
+            values = rows if width is None else itertools.chain.from_iterable(rows)
+            values = numpy.fromiter(values, dtype=numpy.float64, count=len(rows)*(width or 1)).reshape(shape)
+
+        except (TypeError, ValueError):  # Missing values or irregular rows
+            try:
+                values = numpy.array(rows, dtype=numpy.float64)
+            except (TypeError, ValueError):
+                values = None
 
-    except urllib.error.URLError as e:
-        if hasattr(e, 'reason'):
-            print("Return Code", e.reason)
+    if values is None or values.shape != shape:
+        raise LCRError("Unexpected light curve data format. Expected %s values in each row." % (width or 1))
 
-        elif hasattr(e, 'code'):
-            print("Return Code", e.code)
+    return values
 
 
+def _trimData(data, met_start):
+    """Return a copy of the decoded light curve data that only contains the bins after met_start
+
+    """
+
+    def count_new(rows):
+        # The bins are ordered in time, so only the tail of each list needs to be inspected
+        index = len(rows)
+        while index > 0 and rows[index-1][0] > met_start:
+            index -= 1
+        return len(rows) - index
+
+    trimmed = {}
+
+    n_bins = count_new(data['ts'])
+
+    for key, rows in data.items():
+        if key in ['dlogl', 'EG', 'GAL', 'bin_id']:
+            # These lists don't carry an MET column and are aligned with the ts list
+            trimmed[key] = rows[len(rows)-n_bins:]
+        elif isinstance(rows, (list, numpy.ndarray)):
+            trimmed[key] = rows[len(rows)-count_new(rows):]
+        else:
+            trimmed[key] = rows
+
+    return trimmed
+
+
+def _parseLightCurve(data):
+    """Convert the decoded light curve data into a LightCurve object
+
+    """
+
     # Store all the data in a light curve object
     lightCurve = LightCurve()
 
-    # Extract the MET values
-    met_all = numpy.array(data['ts'])[:,0]
-    met_detections = numpy.array(data['flux'])[:,0]
-    try:
-        met_upperlimits = numpy.array(data['flux_upper_limits'])[:,0]
-    except IndexError:  # If there are no upper limits
-        met_upperlimits = numpy.array([])
-
-    # Create detection and nondetection indices (not currently used)
-    detections = numpy.where(numpy.in1d(met_all, met_detections))[0]
-    upperlimits = numpy.where(numpy.in1d(met_all, met_upperlimits))[0]
-
-    # Add the data to the lightCurve object
-    # lightCurve['ts'] = numpy.array(data['ts'])[:,0], numpy.array(data['ts'])[:,1]
-    # lightCurve['flux'] = numpy.array(data['flux'])[:,0], numpy.array(data['flux'])[:,1]
-    # lightCurve['flux_upper_limits'] = numpy.array(data['flux_upper_limits'])[:,0], numpy.array(data['flux_upper_limits'])[:,1]
-    # lightCurve['flux_error'] = numpy.array(data['flux_error'])[:,0], numpy.array(data['flux_error'])[:,1]
-    # lightCurve['photon_index'] = numpy.array(data['photon_index'])[:,0], numpy.array(data['photon_index'])[:,1]
-    # lightCurve['photon_index_interval'] = numpy.array(data['photon_index_interval'])[:,0], numpy.array(data['photon_index_interval'])[:,1]
-    # lightCurve['fit_tolerance'] = numpy.array(data['fit_tolerance'])[:,0], numpy.array(data['fit_tolerance'])[:,1]
-    # lightCurve['fit_convergence'] = numpy.array(data['fit_convergence'])[:,0], numpy.array(data['fit_convergence'])[:,1]
-    # lightCurve['dlogl'] = numpy.array(data['ts'])[:,0], numpy.array(data['dlogl'])
-    # lightCurve['EG'] = numpy.array(data['ts'])[:,0], numpy.array(data['EG'])
-    # lightCurve['GAL'] = numpy.array(data['ts'])[:,0], numpy.array(data['GAL'])
-    # lightCurve['bin_id'] = numpy.array(data['ts'])[:,0], numpy.array(data['bin_id'])
-
-    # lightCurve['met'] = numpy.array(data['ts'])[:,0]
-    # lightCurve['met_detections'] = numpy.array(data['flux'])[:,0]
-    # lightCurve['met_upperlimits'] = numpy.array(data['flux_upper_limits'])[:,0]
-    # lightCurve['ts'] = numpy.array(data['ts'])[:,1]
-    # lightCurve['flux'] = numpy.array(data['flux'])[:,1]
-    # lightCurve['flux_upper_limits'] = numpy.array(data['flux_upper_limits'])[:,1]
-    # lightCurve['flux_error'] = numpy.array(data['flux_error'])[:,1]
-    # lightCurve['photon_index'] = numpy.array(data['photon_index'])[:,1]
-    # lightCurve['photon_index_interval'] = numpy.array(data['photon_index_interval'])[:,1]
-    # lightCurve['fit_tolerance'] = numpy.array(data['fit_tolerance'])[:,1]
-    # lightCurve['fit_convergence'] = numpy.array(data['fit_convergence'])[:,1]
-    # lightCurve['dlogl'] = numpy.array(data['dlogl'])
-    # lightCurve['EG'] = numpy.array(data['EG'])
-    # lightCurve['GAL'] = numpy.array(data['GAL'])
-    # lightCurve['bin_id'] = numpy.array(data['bin_id'])
-
-    lightCurve.met = numpy.array(data['ts'])[:,0]
-    lightCurve.met_detections = numpy.array(data['flux'])[:,0]
-    lightCurve.met_upperlimits = met_upperlimits
-    lightCurve.ts = numpy.array(data['ts'])[:,1]
-    lightCurve.flux = numpy.array(data['flux'])[:,1]
-    lightCurve.flux_upper_limits = numpy.array(data['flux_upper_limits'])[:,1]
-    lightCurve.flux_error = numpy.array(data['flux_error'])[:,1:]
-    lightCurve.photon_index = numpy.array(data['photon_index'])[:,1]
-    lightCurve.photon_index_interval = numpy.array(data['photon_index_interval'])[:,1]
-    lightCurve.fit_tolerance = numpy.array(data['fit_tolerance'])[:,1]
-    lightCurve.fit_convergence = numpy.array(data['fit_convergence'])[:,1]
-    lightCurve.dlogl = numpy.array(data['dlogl'])
-    lightCurve.EG = numpy.array(data['EG'])
-    lightCurve.GAL = numpy.array(data['GAL'])
+    # Convert each field exactly once, the MET and value columns are views into the converted arrays
+    ts = _columns(data['ts'], 2)
+    flux = _columns(data['flux'], 2)
+    flux_upper_limits = _columns(data['flux_upper_limits'], 2)
+    flux_error = _columns(data['flux_error'], 3)
+    photon_index = _columns(data['photon_index'], 2)
+    photon_index_interval = _columns(data['photon_index_interval'], 2)
+    fit_tolerance = _columns(data['fit_tolerance'], 2)
+    fit_convergence = _columns(data['fit_convergence'], 2)
+
+    lightCurve.met = ts[:,0]
+    lightCurve.met_detections = flux[:,0]
+    lightCurve.met_upperlimits = flux_upper_limits[:,0]
+    lightCurve.ts = ts[:,1]
+    lightCurve.flux = flux[:,1]
+    lightCurve.flux_upper_limits = flux_upper_limits[:,1]
+    lightCurve.flux_error = flux_error[:,1:]
+    lightCurve.photon_index = photon_index[:,1]
+    lightCurve.photon_index_interval = photon_index_interval[:,1]
+    lightCurve.fit_tolerance = fit_tolerance[:,1]
+    lightCurve.fit_convergence = fit_convergence[:,1]
+    lightCurve.dlogl = _columns(data['dlogl'])
+    lightCurve.EG = _columns(data['EG'])
+    lightCurve.GAL = _columns(data['GAL'])
     lightCurve.bin_id = numpy.array(data['bin_id'])
 
+    return lightCurve
+
+
+def _retrieveLightCurve(source, cadence, flux_type, index_type, ts_min, verbose=False, use_cache=True, rate_limiter=None):
+    """Retrieve a light curve from the on-disk cache or the repository, raising an LCRError on failure.
+    Returns the light curve and the time at which its data was downloaded.
+
+    """
+
+    start = time.perf_counter()
+
+    data, timestamp = _fetchData(source, cadence, flux_type, index_type, ts_min, verbose=verbose, use_cache=use_cache, rate_limiter=rate_limiter)
+
+    parse_start = time.perf_counter()
+    lightCurve = _parseLightCurve(data)
+
+    emit('parse', source=source, duration=time.perf_counter() - parse_start, bins=len(lightCurve.met),
+        detections=len(lightCurve.flux), upper_limits=len(lightCurve.flux_upper_limits))
+
     lightCurve.source = source
     lightCurve.cadence = cadence
     lightCurve.flux_type = flux_type
     lightCurve.index_type = index_type
     lightCurve.ts_min = ts_min
 
+    emit('fetch', source=source, cadence=cadence, duration=time.perf_counter() - start, bins=len(lightCurve.met))
 
-    return lightCurve
+    return lightCurve, timestamp
+
+
+def _fetchLightCurve(source, cadence, flux_type, index_type, ts_min, verbose=False, use_cache=True, rate_limiter=None):
+    """Retrieve a light curve from the in-memory cache, an in-flight request for the same light curve, the on-disk
+    cache or the repository, raising an LCRError on failure
+
+    """
+
+    # Accept source names that differ from the catalog name only in spacing or case
+    source = catalog.lookup(source) or source
+
+    if use_cache == False:
+        return _retrieveLightCurve(source, cadence, flux_type, index_type, ts_min, verbose=verbose, use_cache=False, rate_limiter=rate_limiter)[0]
+
+    # Light curves from different repositories are kept apart
+    key = (repository_url, source, cadence, flux_type, index_type, ts_min)
+
+    lightCurve, origin = memory_cache.get(key, cadence, lambda: _retrieveLightCurve(source, cadence, flux_type, index_type, ts_min,
+        verbose=verbose, use_cache=True, rate_limiter=rate_limiter))
+
+    emit('memory', source=source, cadence=cadence, hit=origin == 'memory', coalesced=origin == 'coalesced')
+
+    # Give each caller its own object, the arrays are shared
+    return copy.copy(lightCurve)
+
+
+def _mergeLightCurves(lightCurve, update):
+    """Combine a light curve with a light curve containing newer bins, with the newer bins taking precedence
+
+    """
+
+    merged = LightCurve()
+
+    merged.source = lightCurve.source
+    merged.cadence = lightCurve.cadence
+    merged.flux_type = lightCurve.flux_type
+    merged.index_type = lightCurve.index_type
+    merged.ts_min = lightCurve.ts_min
+
+    # Drop any existing bins that are superseded by the update
+    keep_bins = ~numpy.isin(lightCurve.bin_id, update.bin_id)
+    keep_detections = ~numpy.isin(lightCurve.met_detections, update.met)
+    keep_upperlimits = ~numpy.isin(lightCurve.met_upperlimits, update.met)
+
+    for fields, keep in [(bin_fields, keep_bins), (detection_fields, keep_detections), (upperlimit_fields, keep_upperlimits)]:
+
+        # Concatenate each group of fields and keep it ordered in time
+        arrays = {}
+        for field in fields:
+            old = getattr(lightCurve, field)[keep]
+            new = getattr(update, field)
+            arrays[field] = numpy.concatenate([old, new]) if len(new) > 0 else old
+
+        order = numpy.argsort(arrays[fields[0]], kind='stable')
+
+        for field in fields:
+            setattr(merged, field, arrays[field][order])
+
+    return merged
+
+
+def updateLightCurve(lightCurve, verbose=False, use_cache=True):
+    """Extend an existing light curve with any bins that have been added to the repository since it was retrieved
+
+    Only the bins after the last MET of the existing light curve are converted and merged, with bins
+    sharing a bin_id replaced by their newer values. The repository doesn't support time-restricted
+    queries, so the full light curve is still requested unless a valid copy exists in the cache.
+
+    Arguments:
+        lightCurve (Obj):       An instance of the LightCurve class
+        verbose (BOOL):         Log the query url. Default = False
+        use_cache (BOOL):       Use the on-disk light curve cache, skipping the download if a valid copy exists. Default = True
+
+    Returns:
+        A new LightCurve object containing the existing and the new bins
+
+    """
+
+    try:
+        data, timestamp = _fetchData(lightCurve.source, lightCurve.cadence, lightCurve.flux_type, lightCurve.index_type, lightCurve.ts_min,
+            verbose=verbose, use_cache=use_cache)
+    except LCRError as e:
+        logger.error(e)
+        return None
+
+    # Only convert the bins that are newer than the existing light curve
+    if len(lightCurve.met) > 0:
+        data = _trimData(data, numpy.max(lightCurve.met))
+
+    update = _parseLightCurve(data)
+
+    return _mergeLightCurves(lightCurve, update)
+
+
+def getLightCurve(source, cadence='daily', flux_type='photon', index_type='fixed', ts_min=4, verbose=False, use_cache=True):
+    """Download data from the light curve repository
+
+    Arguments:
+        source (str):           A 4FGL catalog name, e.g. '4FGL J0001.2-0747'. Differences in spacing and case are ignored.
+        cadence (str):          Specifies the requested light curve cadence. Options include: 'daily', 'weekly', and 'monthly'
+        flux_type (str):        Specifies the requested flux type. Options include 'photon' and 'energy'
+        index_type (str):       Specifies the spectral index freedom during fit. Options include 'free' and 'fixed'
+        ts_min (int):           The minimum likelihood ratio test statistic for which a flux estimate is reported as opposed to an upper limit.
+        verbose (BOOL):         Log the query url. Default = False
+        use_cache (BOOL):       Use the on-disk light curve cache, skipping the download if a valid copy exists. Default = True
+
+    Returns:
+        A key-value pair dictionary containing numpy arrays of light curve data
+
+    """
+
+    try:
+        return _fetchLightCurve(source, cadence, flux_type, index_type, ts_min, verbose=verbose, use_cache=use_cache)
+    except LCRError as e:
+        logger.error(e)
+        return None
+
+
+def getLightCurves(sources=None, cadence='daily', flux_type='photon', index_type='fixed', ts_min=4, max_workers=8, rate_limit=4, verbose=False, use_cache=True):
+    """Download data for many sources from the light curve repository concurrently
+
+    Arguments:
+        sources (list):         A list of 4FGL catalog names. Default = None, which requests every source tracked by the LCR
+        cadence (str):          Specifies the requested light curve cadence. Options include: 'daily', 'weekly', and 'monthly'
+        flux_type (str):        Specifies the requested flux type. Options include 'photon' and 'energy'
+        index_type (str):       Specifies the spectral index freedom during fit. Options include 'free' and 'fixed'
+        ts_min (int):           The minimum likelihood ratio test statistic for which a flux estimate is reported as opposed to an upper limit.
+        max_workers (int):      The maximum number of concurrent downloads. Default = 8
+        rate_limit (float):     The maximum number of requests per second sent to the repository. Default = 4
+        verbose (BOOL):         Log the query urls. Default = False
+        use_cache (BOOL):       Use the on-disk light curve cache, skipping the download if a valid copy exists. Default = True
+
+    Returns:
+        A dictionary of LightCurve objects keyed by source name, and a dictionary of error messages
+        keyed by the name of each source that could not be retrieved
+
+    """
+
+    if sources is None:
+        sources = catalog.names
+
+    rate_limiter = RateLimiter(rate_limit) if rate_limit is not None else None
+
+    lightCurves = {}
+    errors = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        # Submit one download per unique source
+        futures = {}
+        for source in dict.fromkeys(sources):
+            future = executor.submit(_fetchLightCurve, source, cadence, flux_type, index_type, ts_min,
+                verbose=verbose, use_cache=use_cache, rate_limiter=rate_limiter)
+            futures[future] = source
+
+        # Collect the results without letting a single failure abort the batch
+        for future in concurrent.futures.as_completed(futures):
+            source = futures[future]
+            try:
+                lightCurves[source] = future.result()
+            except Exception as e:
+                errors[source] = str(e).strip()
+
+    return lightCurves, errors
+
+
+def setRepositoryURL(url=None):
+    """Set the address of the repository's query service. Light curves downloaded from different
+    addresses share the on-disk cache, so use a separate cache directory when switching to a mirror
+    or a MockRepository.
+
+    Arguments:
+        url (str):              The url of the query service. Default = None, which restores the Fermi Science Support Center address
+
+    Returns:
+        None
+
+    """
+
+    global repository_url
 
+    repository_url = url if url is not None else default_url
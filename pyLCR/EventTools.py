@@ -0,0 +1,171 @@
+import sys
+import logging
+import threading
+
+##########################################################################################
+
+# The logger used for all pyLCR messages. Like any library logger it only has a NullHandler and passes
+# its messages on to the handlers configured by the application, while logToStdout restores the
+# undecorated stdout output of earlier versions.
+logger = logging.getLogger('pyLCR')
+logger.addHandler(logging.NullHandler())
+
+# The handler added by logToStdout
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(logging.Formatter('%(message)s'))
+
+# The functions called with every instrumentation event. The tuple is replaced rather than
+# modified, so emitting an event never needs a lock.
+_listeners = ()
+_lock = threading.Lock()
+
+##########################################################################################
+
+def addListener(callback):
+    """Register a function that is called with every instrumentation event
+
+    Each event is a dictionary with a 'stage' key, one of 'request', 'memory', 'cache', 'decode', 'parse',
+    'fetch', 'plot' or 'poll', a 'duration' key in seconds, and stage specific keys such as 'source', 'bytes' and 'bins'.
+    Listeners are called from the thread that performs the work, so they must be thread-safe.
+
+    Arguments:
+        callback (function):    A function taking a single event dictionary as its argument
+
+    Returns:
+        None
+
+    """
+
+    global _listeners
+
+    with _lock:
+        _listeners = _listeners + (callback,)
+
+##########################################################################################
+
+def removeListener(callback):
+    """Stop calling a function registered with addListener
+
+    Arguments:
+        callback (function):    The function to remove
+
+    Returns:
+        None
+
+    """
+
+    global _listeners
+
+    with _lock:
+        _listeners = tuple(listener for listener in _listeners if listener != callback)
+
+##########################################################################################
+
+def emit(stage, **fields):
+    """Send an instrumentation event to the registered listeners and to the logger at the DEBUG level
+
+    """
+
+    listeners = _listeners
+
+    if len(listeners) == 0 and not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    event = dict(stage=stage, **fields)
+
+    logger.debug('%s: %s', stage, ', '.join('%s=%s' % (key, value) for key, value in fields.items()))
+
+    for listener in listeners:
+        listener(event)
+
+##########################################################################################
+
+def setLogLevel(level):
+    """Set the level of the messages written by pyLCR
+
+    Arguments:
+        level (str):            A logging level, e.g. 'WARNING' to suppress the download progress messages or 'DEBUG' to log every instrumentation event
+
+    Returns:
+        None
+
+    """
+
+    logger.setLevel(level)
+
+##########################################################################################
+
+def logToStdout(enabled=True, level='INFO'):
+    """Write the messages of pyLCR, such as the download progress messages, to stdout without any decoration,
+    e.g. in an interactive session where logging hasn't been configured
+
+    Arguments:
+        enabled (BOOL):         Start writing the messages to stdout, or stop if False. Default = True
+        level (str):            The logging level of the messages to write. Default = 'INFO'
+
+    Returns:
+        None
+
+    """
+
+    if enabled == True:
+        logger.setLevel(level)
+        if _handler not in logger.handlers:
+            logger.addHandler(_handler)
+
+        # Don't write each message a second time through the handlers of the application
+        logger.propagate = False
+
+    else:
+        logger.removeHandler(_handler)
+        logger.propagate = True
+
+##########################################################################################
+
+class MetricsRecorder():
+    """
+    An instrumentation listener that accumulates the number of events, the total duration, and the totals
+    of any other numeric fields for each stage. Register an instance with addListener and call summary
+    once the work is done. If keep_events is True, every event is also stored in the events list.
+
+    """
+
+    def __init__(self, keep_events=False):
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.events = []
+        self.keep_events = keep_events
+
+    def __call__(self, event):
+        with self.lock:
+            totals = self.totals.setdefault(event['stage'], {'count': 0})
+            totals['count'] += 1
+
+            # Booleans such as cache hits are counted, while status codes aren't meaningful totals
+            for key, value in event.items():
+                if isinstance(value, (int, float)) and key != 'status':
+                    totals[key] = totals.get(key, 0) + value
+
+            if self.keep_events == True:
+                self.events.append(event)
+
+    def reset(self):
+        """
+        Discard the accumulated totals
+
+        """
+
+        with self.lock:
+            self.totals = {}
+            self.events = []
+
+    def summary(self):
+        """
+        Return the accumulated totals as a dictionary keyed by stage
+
+        """
+
+        with self.lock:
+            return {stage: dict(totals) for stage, totals in self.totals.items()}
+
+##########################################################################################
@@ -0,0 +1,292 @@
+import os
+import json
+import zlib
+import gzip
+import time
+import numpy
+import argparse
+import threading
+import urllib.parse
+import http.server
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .TimeTools import mission_start
+from .TimeTools import cadence_seconds
+
+##########################################################################################
+
+# The number of bins generated for each cadence by default, roughly the size of the light curves after 15 years
+default_bins = {'daily': 5500, 'weekly': 785, 'monthly': 183}
+
+##########################################################################################
+
+def generateLightCurveData(n_bins=None, cadence='daily', flux_type='photon', index_type='fixed', ts_min=4, seed=0):
+    """Generate synthetic light curve data with the same json schema as the repository
+
+    The flux follows a log-normal red noise process, so the light curves contain flares and quiescent periods,
+    and bins whose TS is below ts_min are reported as upper limits.
+
+    Arguments:
+        n_bins (int):           The number of time bins. Default = None, which uses a realistic size for the cadence
+        cadence (str):          The light curve cadence. Options include: 'daily', 'weekly', and 'monthly'
+        flux_type (str):        The flux type. Options include 'photon' and 'energy'
+        index_type (str):       The spectral index freedom during fit. Options include 'free' and 'fixed'
+        ts_min (int):           The minimum TS for which a flux estimate is reported as opposed to an upper limit. Default = 4
+        seed (int):             The seed of the random number generator. Default = 0
+
+    Returns:
+        The json encoded light curve data as bytes
+
+    """
+
+    if n_bins is None:
+        n_bins = default_bins[cadence]
+
+    random = numpy.random.default_rng(seed)
+
+    # Place the bin centers on the mission's cadence grid
+    met = mission_start + cadence_seconds[cadence] * (numpy.arange(n_bins) + 0.5)
+
+    # Generate an AR(1) process in log flux, so that bright states persist over several bins
+    innovations = random.normal(0, 0.3, n_bins)
+    log_flux = numpy.empty(n_bins)
+    level = 0.0
+    for index in range(n_bins):
+        level = 0.9 * level + innovations[index]
+        log_flux[index] = level
+
+    flux = 10**(-7.3 + random.normal(0, 0.5) + log_flux / numpy.log(10))
+    if flux_type == 'energy':
+        flux *= 1e-3
+
+    # The significance of each bin scales with its flux
+    ts = numpy.maximum(random.normal(25 * flux / numpy.median(flux), 3), 0)
+    detected = ts >= ts_min
+
+    relative_error = numpy.clip(2 / numpy.sqrt(numpy.maximum(ts, 1)), 0.05, 1.0)
+    flux_error = flux * relative_error
+
+    if index_type == 'fixed':
+        photon_index = numpy.full(n_bins, 2.2)
+        photon_index_interval = numpy.zeros(n_bins)
+    else:
+        photon_index = random.normal(2.2, 0.15, n_bins)
+        photon_index_interval = numpy.abs(random.normal(0.15, 0.05, n_bins))
+
+    def rows(*columns):
+        return numpy.column_stack(columns).tolist()
+
+    data = {'ts': rows(met, ts),
+            'flux': rows(met[detected], flux[detected]),
+            'flux_upper_limits': rows(met[~detected], (flux + 2 * flux_error)[~detected]),
+            'flux_error': rows(met[detected], (flux - flux_error)[detected], (flux + flux_error)[detected]),
+            'photon_index': rows(met[detected], photon_index[detected]),
+            'photon_index_interval': rows(met[detected], photon_index_interval[detected]),
+            'fit_tolerance': rows(met, random.uniform(0, 0.1, n_bins)),
+            'fit_convergence': rows(met, (random.random(n_bins) < 0.02).astype(int)),
+            'dlogl': random.uniform(0, 5, n_bins).tolist(),
+            'EG': random.uniform(0.5, 1.5, n_bins).tolist(),
+            'GAL': random.uniform(0.5, 1.5, n_bins).tolist(),
+            'bin_id': numpy.arange(n_bins).tolist()}
+
+    if orjson is not None:
+        return orjson.dumps(data)
+
+    return json.dumps(data).encode()
+
+##########################################################################################
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answers light curve requests with the data provided by the MockRepository that owns the server
+
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    # Send the headers and body without waiting for the client's delayed acknowledgements
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        repository = self.server.repository
+
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        query = {key: values[0] for key, values in query.items()}
+
+        if query.get('typeOfRequest') != 'lightCurveData' or 'source_name' not in query:
+            self._respond(400, b'')
+            return
+
+        if repository.latency > 0:
+            time.sleep(repository.latency)
+
+        compress = repository.gzip and 'gzip' in self.headers.get('Accept-Encoding', '')
+
+        body = repository.get_data(query['source_name'], query.get('cadence', 'daily'), query.get('flux_type', 'photon'),
+            query.get('index_type', 'fixed'), query.get('ts_min', '4'), compress=compress)
+
+        if body is None:
+            self._respond(404, b'')
+            return
+
+        self._respond(200, body, compress)
+
+    def _respond(self, status, body, compress=False):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockRepository():
+    """
+    A local stand-in for the repository's query service, for testing and benchmarking without network access.
+    Requests are answered with recorded json files from a fixture directory when one is available, and
+    otherwise with synthetic data whose random seed is derived from the request, so every run is reproducible.
+    The seed deliberately leaves out ts_min, so requests that differ only in the TS threshold return the same
+    bins, split differently between detections and upper limits.
+
+    Fixture files use the same names as the on-disk cache, so a cache directory filled by getLightCurve can be
+    replayed directly.
+
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, directory=None, n_bins=None, latency=0.0, gzip=True):
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.n_bins = n_bins
+        self.latency = latency
+        self.gzip = gzip
+
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.payloads = {}
+
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        """
+        The url of the query service, which can be passed to pyLCR.setRepositoryURL
+
+        """
+
+        return 'http://%s:%s/queryDB.php' % (self.host, self.port)
+
+    def get_data(self, source, cadence, flux_type, index_type, ts_min, compress=False):
+        """
+        Return the json data for a request, gzip compressed if requested, or None if the request can't be answered.
+        Each response is only created once and kept in memory, so repeated requests measure the client alone.
+
+        """
+
+        if cadence not in cadence_seconds:
+            return None
+
+        # Quote every character that could form a path, such as '/'
+        source_quoted = urllib.parse.quote(source, safe='')
+        filename = '_'.join([source_quoted, cadence, flux_type, index_type, "tsmin" + str(ts_min)]) + ".json"
+
+        key = (filename, compress)
+
+        with self.lock:
+            self.requests += 1
+            if key in self.payloads:
+                return self.payloads[key]
+
+        # Replay a recorded fixture if there is one, refusing any path that leads outside the fixture directory
+        path = None
+        if self.directory is not None:
+            directory = os.path.realpath(self.directory)
+            path = os.path.realpath(os.path.join(directory, filename))
+            if os.path.commonpath([directory, path]) != directory:
+                return None
+
+        if path is not None and os.path.isfile(path):
+            with open(path, 'rb') as file:
+                body = file.read()
+
+        else:
+            try:
+                ts_min = float(ts_min)
+            except ValueError:
+                return None
+
+            # The threshold only splits the bins between detections and upper limits, so it doesn't change the seed
+            seed = zlib.crc32('_'.join([source_quoted, cadence, flux_type, index_type]).encode())
+            body = generateLightCurveData(self.n_bins, cadence=cadence, flux_type=flux_type, index_type=index_type, ts_min=ts_min, seed=seed)
+
+        if compress == True:
+            body = gzip.compress(body, 1)
+
+        with self.lock:
+            return self.payloads.setdefault(key, body)
+
+    def start(self):
+        """
+        Start serving requests in a background thread
+
+        """
+
+        self.server = http.server.ThreadingHTTPServer((self.host, self.port), _RequestHandler)
+        self.server.daemon_threads = True
+        self.server.repository = self
+        self.port = self.server.server_address[1]
+
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stop the server
+
+        """
+
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+            self.server = None
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+##########################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Serve synthetic or recorded light curves in place of the Fermi-LAT Light Curve Repository')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--directory', default=None, help='A directory of recorded json files, e.g. a pyLCR cache directory')
+    parser.add_argument('--n_bins', type=int, default=None, help='The number of bins in each synthetic light curve')
+    parser.add_argument('--latency', type=float, default=0.0, help='The delay added to each response in seconds')
+    arguments = parser.parse_args()
+
+    repository = MockRepository(arguments.host, arguments.port, directory=arguments.directory, n_bins=arguments.n_bins, latency=arguments.latency)
+    repository.start()
+
+    print("Serving light curves at %s" % repository.url)
+
+    try:
+        repository.thread.join()
+    except KeyboardInterrupt:
+        repository.stop()
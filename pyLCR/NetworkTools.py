@@ -0,0 +1,308 @@
+import time
+import gzip
+import zlib
+import threading
+import http.client
+import urllib.parse
+import urllib.request
+
+from .EventTools import emit
+
+##########################################################################################
+
+# The HTTP status codes that indicate a transient server problem worth retrying
+retry_codes = [429, 500, 502, 503, 504]
+
+# The number of bytes read at a time when a response is streamed
+chunk_size = 65536
+
+##########################################################################################
+
+class NetworkError(Exception):
+    """
+    An exception raised when a request fails, with the HTTP status code if the server responded
+
+    """
+
+    def __init__(self, code=None, reason=None):
+        self.code = code
+        self.reason = reason
+        super().__init__("Return Code %s" % (code if code is not None else reason))
+
+
+class RateLimiter():
+    """
+    A thread-safe limiter that spaces the requests made to each host by at least 1/rate seconds
+
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_time = {}
+
+    def wait(self, host):
+        """
+        Block until a request to the given host is allowed
+
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time.get(host, now))
+            self.next_time[host] = start + self.interval
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class Session():
+    """
+    A thread-safe HTTP client that keeps connections to each host alive between requests, optionally
+    requests gzip transfer encoding, and retries transient failures with an exponential backoff
+
+    """
+
+    def __init__(self, timeout=60, retries=3, backoff=0.5, gzip=True, max_idle=16):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.gzip = gzip
+        self.max_idle = max_idle
+
+        self.lock = threading.Lock()
+        self.idle = {}
+
+    def _connect(self, scheme, netloc):
+        """
+        Open a new connection to a host, going through a proxy if one is configured in the environment
+
+        """
+
+        if scheme == 'https':
+            connection_class = http.client.HTTPSConnection
+        else:
+            connection_class = http.client.HTTPConnection
+
+        proxy = urllib.request.getproxies().get(scheme)
+        host = urllib.parse.urlsplit(scheme + '://' + netloc).hostname
+
+        if proxy is None or urllib.request.proxy_bypass(host):
+            return connection_class(netloc, timeout=self.timeout), False
+
+        proxy_netloc = urllib.parse.urlsplit(proxy).netloc or proxy
+
+        if scheme == 'https':
+            connection = connection_class(proxy_netloc, timeout=self.timeout)
+            connection.set_tunnel(netloc)
+            return connection, False
+
+        # Plain http requests are forwarded by the proxy using the absolute url
+        return http.client.HTTPConnection(proxy_netloc, timeout=self.timeout), True
+
+    def _acquire(self, key):
+        """
+        Return an idle connection to a host if one is available, or a new connection
+
+        """
+
+        with self.lock:
+            connections = self.idle.get(key)
+            if connections:
+                connection, absolute = connections.pop()
+                return connection, absolute, True
+
+        connection, absolute = self._connect(*key)
+
+        return connection, absolute, False
+
+    def _release(self, key, connection, absolute):
+        """
+        Return a connection to the pool of idle connections
+
+        """
+
+        with self.lock:
+            connections = self.idle.setdefault(key, [])
+            if len(connections) < self.max_idle:
+                connections.append((connection, absolute))
+                return
+
+        connection.close()
+
+    def close(self):
+        """
+        Close all of the idle connections
+
+        """
+
+        with self.lock:
+            idle = self.idle
+            self.idle = {}
+
+        for connections in idle.values():
+            for connection, absolute in connections:
+                connection.close()
+
+    def _stream(self, response, decoder):
+        """
+        Pass the response body to a decoder in chunks as it arrives and return the decoded result and
+        the number of bytes received
+
+        """
+
+        size = 0
+        decompressor = None
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            decompressor = zlib.decompressobj(wbits=31)
+
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            decoder.feed(chunk)
+
+        if decompressor is not None:
+            decoder.feed(decompressor.flush())
+            if not decompressor.eof:
+                raise EOFError("Compressed response ended before the end-of-stream marker was reached")
+
+        return decoder.close(), size
+
+    def get(self, url, rate_limiter=None, decoder=None):
+        """
+        Request a url and return the response body
+
+        Arguments:
+            url (str):              The url to request
+            rate_limiter (Obj):     An optional instance of the RateLimiter class applied to every attempt
+            decoder (function):     An optional function returning a new object with feed and close methods, to which a
+                                    successful response body is streamed in chunks instead of being read in full
+
+        Returns:
+            The response body as bytes, or the result of the decoder's close method
+
+        """
+
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        headers = {}
+        if self.gzip == True:
+            headers['Accept-Encoding'] = 'gzip'
+
+        attempt = 0
+        while True:
+
+            if rate_limiter is not None:
+                rate_limiter.wait(parts.netloc)
+
+            connection, absolute, reused = self._acquire(key)
+
+            start = time.perf_counter()
+            connect_time = 0.0
+
+            try:
+                # Open new connections explicitly so that the connection time, including DNS, is measured separately
+                if connection.sock is None:
+                    connection.connect()
+                    connect_time = time.perf_counter() - start
+
+                connection.request('GET', url if absolute else target, headers=headers)
+                response = connection.getresponse()
+                wait_time = time.perf_counter() - start - connect_time
+
+                if decoder is not None and 200 <= response.status <= 299:
+                    body, size = self._stream(response, decoder())
+                else:
+                    body = response.read()
+                    size = len(body)
+                    if 200 <= response.status <= 299 and response.getheader('Content-Encoding', '').lower() == 'gzip':
+                        body = gzip.decompress(body)
+
+            except (zlib.error, EOFError) as e:
+                # A corrupt or truncated compressed body is retried like any other failed transfer
+                connection.close()
+                error = NetworkError(reason=e)
+
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+
+                # An idle connection may have been closed by the server, so retry immediately on a new one. Other
+                # failures, such as timeouts, count as an attempt and are retried after the backoff.
+                if reused == True and isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    continue
+
+                error = NetworkError(reason=e)
+
+            except BaseException:
+                # Don't return a partially read connection to the pool
+                connection.close()
+                raise
+
+            else:
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._release(key, connection, absolute)
+
+                duration = time.perf_counter() - start
+                emit('request', url=url, status=response.status, attempt=attempt, reused=reused, duration=duration,
+                    connect=connect_time, wait=wait_time, transfer=duration - connect_time - wait_time, bytes=size)
+
+                if 200 <= response.status <= 299:
+                    return body
+
+                error = NetworkError(code=response.status)
+
+                if response.status not in retry_codes:
+                    raise error
+
+            if attempt >= self.retries:
+                raise error
+
+            # Back off exponentially before retrying
+            time.sleep(self.backoff * 2**attempt)
+            attempt += 1
+
+
+# The session shared by all downloads
+session = Session()
+
+##########################################################################################
+
+def setSessionOptions(timeout=None, retries=None, backoff=None, gzip=None):
+    """Configure the HTTP session used to download data from the repository
+
+    Arguments:
+        timeout (float):        The connection and read timeout in seconds. Default = 60
+        retries (int):          The number of times a transient failure is retried. Default = 3
+        backoff (float):        The delay before the first retry in seconds, doubling with each attempt. Default = 0.5
+        gzip (BOOL):            Request gzip transfer encoding. Default = True
+
+    Returns:
+        None
+
+    """
+
+    if timeout is not None:
+        session.timeout = timeout
+        session.close()
+
+    if retries is not None:
+        session.retries = retries
+
+    if backoff is not None:
+        session.backoff = backoff
+
+    if gzip is not None:
+        session.gzip = gzip
+
+##########################################################################################
@@ -0,0 +1,80 @@
+import numpy
+
+from .BatchTools import _loadItem
+from .BatchTools import _runBatch
+
+##########################################################################################
+
+def _periodogramWorker(task):
+    """Calculate the periodogram of a single light curve in a batch process
+
+    """
+
+    item, keep_power, kwargs = task
+
+    # Light curves can be passed as LightCurve objects or as paths written by LightCurve.save
+    lightCurve = _loadItem(item)
+
+    frequency, power, false_alarm = lightCurve.lomb_scargle(**kwargs)
+
+    if len(power) == 0 or numpy.all(numpy.isnan(power)):
+        raise ValueError("The light curve has too few measurements for a periodogram")
+
+    # Summarize the highest peak
+    peak = numpy.nanargmax(power)
+
+    result = {'source': lightCurve.source,
+              'cadence': lightCurve.cadence,
+              'peak_frequency': frequency[peak],
+              'peak_period': 1.0 / frequency[peak],
+              'peak_power': power[peak],
+              'false_alarm_probability': false_alarm[peak]}
+
+    if keep_power == True:
+        result['frequency'] = frequency
+        result['power'] = power
+        result['false_alarm'] = false_alarm
+
+    return result
+
+##########################################################################################
+
+def computePeriodograms(lightCurves, processes=None, keep_power=False, **kwargs):
+    """Calculate the Lomb-Scargle periodograms of many light curves using a pool of processes, and estimate the
+    false alarm probability of the highest peak of each
+
+    Arguments:
+        lightCurves (list):         A list or dictionary of LightCurve objects, or of paths written by LightCurve.save
+        processes (int):            The number of processes, with 1 calculating in the current process. Default = the number of CPUs
+        keep_power (BOOL):          Return the complete periodogram of each light curve in addition to its highest peak. Default = False
+        **kwargs:                   Additional periodogram options accepted by LightCurve.lomb_scargle, e.g. maximum_frequency, upper_limits
+
+    Returns:
+        A dictionary of results and a dictionary of error messages for the light curves that could not be analyzed, both keyed
+        by the dictionary key of each light curve, e.g. the source name for the results of getLightCurves, or by its position if
+        a list is given. Each result is a dictionary holding the 'source' and 'cadence', the 'peak_frequency' in 1/day,
+        'peak_period' in days, 'peak_power' and 'false_alarm_probability' of the highest peak, and the 'frequency', 'power' and
+        'false_alarm' arrays if keep_power is True.
+
+    """
+
+    # Name each light curve by its dictionary key or by its position in the list
+    if isinstance(lightCurves, dict):
+        items = [(name, item) for name, item in lightCurves.items() if item is not None]
+    else:
+        items = [(name, item) for name, item in enumerate(lightCurves) if item is not None]
+
+    tasks = [(item, keep_power, kwargs) for name, item in items]
+
+    periodograms = {}
+    errors = {}
+
+    for (name, item), (result, error) in zip(items, _runBatch(_periodogramWorker, tasks, processes)):
+        if error is None:
+            periodograms[name] = result
+        else:
+            errors[name] = error
+
+    return periodograms, errors
+
+##########################################################################################
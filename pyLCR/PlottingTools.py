@@ -8,98 +8,125 @@ import time
 import datetime
 import os
 import glob
+import inspect
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .BatchTools import _loadItem
+from .BatchTools import _runBatch
+from .EventTools import logger
+from .EventTools import emit
+
+from .TimeTools import computeDate
+from .TimeTools import computeMJD
+from .TimeTools import computeMJDs
+from .TimeTools import getCurrentMET
+from .TimeTools import computeMET
+from .TimeTools import cadence_seconds
 
 ##########################################################################################
 
-def computeDate(MET):
+def _getLayout(plotTS, plotIndex):
+    """Return the number of plot panes and the figure size for the requested panes
 
-    if MET>252460801: MET=MET-1 # 2008 leap second
-    if MET>157766400: MET=MET-1 # 2005 leap second
-    if MET>362793601: MET=MET-1 # 2012 leap second
-    if MET>457401601: MET=MET-1 # 2015 leap second
-    if MET>504921601: MET=MET-1 # 2016 leap second
-    metdate  = datetime.datetime(2001, 1, 1,0,0,0)
-    dt=datetime.timedelta(seconds=MET)
-    date=metdate + dt
-    yy=date.year
-    mm=date.month
-    dd=date.day
-    hr=date.hour
-    mi=date.minute
-    ss=date.second
-    fff=(float(ss+60.*mi+3600.*hr)/86.4)/1000.0
+    """
+
+    if plotTS == True and plotIndex == True:
+        return 3, [18,12]
+    elif plotTS == True or plotIndex == True:
+        return 2, [18,9]
+    else:
+        return 1, [18,6]
+
+##########################################################################################
+
+def _decimate(x, y, n_columns, x_range):
+    """Return the indices of the points with the minimum and maximum y value within each of n_columns equal width intervals of x
+
+    """
 
-    return date, fff
+    # Keep every point if there are fewer points than the decimated series would contain
+    if len(x) <= 2 * n_columns:
+        return numpy.arange(len(x))
 
+    # Assign each point to a column
+    width = (x_range[1] - x_range[0]) or 1.0
+    columns = numpy.clip(((x - x_range[0]) / width * n_columns).astype(int), 0, n_columns - 1)
+
+    # Sort the points by column and then by value, and keep the first and last point of each column
+    order = numpy.lexsort((y, columns))
+    sorted_columns = columns[order]
+    first = numpy.flatnonzero(numpy.r_[True, sorted_columns[1:] != sorted_columns[:-1]])
+    last = numpy.r_[first[1:] - 1, len(order) - 1]
+
+    return numpy.unique(numpy.concatenate([order[first], order[last]]))
 
 ##########################################################################################
 
-def getCurrentMET():
+def _errorbar(ax, x, y, xerr, yerr, collection=False, label=None):
+    """Draw error bars, either with errorbar or as a single line collection
+
+    """
+
+    if collection == False:
+        ax.errorbar(x, y, xerr=xerr, yerr=numpy.transpose(yerr), fmt='none', markersize=5, color='#3e4d8b', ecolor='#3e4d8b', markeredgecolor='black', label=label, capsize=0, alpha=0.6)
+        return
 
-    date = datetime.datetime.now()
-    metdate = datetime.datetime(2001, 1, 1, 0, 0, 0)
-    difference=date-metdate
-    MET=(difference).days*86400.+(difference).seconds
-    if date.year>2005: MET+=1 # 2005 leap second
-    if date.year>2008: MET+=1 # 2008 leap second
-    if (date.month >= 7 and date.year == 2012) or (date.year > 2012): MET+=1 # 2012 leap second
-    if (date.month >= 7 and date.year == 2015) or (date.year > 2015): MET+=1 # 2015 leap second
-    if date.year>2016: MET+=1 # 2016 leap second
+    # Create the horizontal and vertical segments of every error bar
+    horizontal = numpy.stack([numpy.column_stack([x - xerr, y]), numpy.column_stack([x + xerr, y])], axis=1)
+    vertical = numpy.stack([numpy.column_stack([x, y - yerr]), numpy.column_stack([x, y + yerr])], axis=1)
 
-    return MET
+    ax.add_collection(LineCollection(numpy.concatenate([horizontal, vertical]), colors='#3e4d8b', alpha=0.6, label=label))
 
 ##########################################################################################
 
-def computeMJD(MET, returnFraction=True):
+def _getWindow(cadence, xmin, xmax, MET=None, useMJD=False):
+    """Convert an x-axis range into the range of bin METs to draw, including the bins that are partially visible at either end
 
-    # Get the date and fraction of day for the given MET
-    date, fraction = computeDate(MET)
+    """
 
-    # Calculate the number of days since January 1, 4713 BC
-    # JD = date.toordinal() + 1721424.5
-    JD = date.toordinal() + 1721425
+    def toMET(x):
+        if x is None:
+            return None
+        if useMJD == True:
+            return computeMET(x)
+        if MET is not None:
+            return x + MET
+        return x
 
-    # Calculate the number of days since November 17, 1858
-    # MJD = JD - 2400000.5
-    MJD = JD - 2400001
+    # Pad the range by the width of a bin
+    padding = cadence_seconds.get(cadence, 0)
 
-    if returnFraction == True:
-        MJD = MJD + fraction
+    tmin = toMET(xmin)
+    tmax = toMET(xmax)
 
-    return MJD
+    return (tmin - padding if tmin is not None else None), (tmax + padding if tmax is not None else None)
 
 ##########################################################################################
 
-def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=None, triggerMET=None, triggerMJD=None, ylog=False, xlog=False, ymin=None, \
-    ymax=None, xmin=None, xmax=None, removeTicks=1, savefig=False, showPlot=True, plotTS=False, plotIndex=False, extension='.png'):
-    """Plot data from the light curve repository
+def _drawLightCurve(axes, lightCurve, logCenter=False, MET=None, useMJD=False, ylim=None, triggerMET=None, triggerMJD=None, ylog=False, xlog=False, \
+    ymin=None, ymax=None, xmin=None, xmax=None, plotTS=False, plotIndex=False, decimate=False):
+    """Draw a light curve onto a set of existing plot panes. See plotLightCurve for a description of the arguments.
 
     Arguments:
-        lightCurveData (Obj):       An instance of the LightCurve class            
-        logCenter (BOOL):           Whether to use logarithmic bin centers. Default = False         
-        MET (int):                  Reference MET. Default = None
-        useMJD (BOOL):              Specifies whether the y-axis should be in units of MJD. Default = False
-        ylim (list):                Specifies a limit on the y-axis
-        triggerMET (int):           Specifies a trigger MET to highlight on the plot. Default = None
-        triggerMJD (int):           Specifies a trigger MJD to highlight on the plot. Default = None
-        ylog (BOOL):                Enables y-axis logarithmic scaling. Default = False
-        xlog (BOOL):                Enables c-axis logarithmic scaling. Default = False
-        ymin (float):               Specifies a lower limit on the y-axis. Default = None
-        ymax (float):               Specifies a upper limit on the y-axis. Default = None
-        xmin (float):               Specifies a lower limit on the x-axis. Default = None
-        xmax (float):               Specifies an upper limit on the x-axis. Default = None
-        removeTicks (int):          Specifies the number of ticks to remove from the y-axis on multi-axis plots, Default = 1
-        savefig (BOOL):             Specifies whether the plot should be saved to disk. Default = False
-        showPlot (BOOL):            Specifies whether the plot should be displayed to screen. Default = True
-        plotTS (BOOL):              Specifies whether the TS should be displayed on a seperate plot pane. Default = False
-        plotIndex (BOOL):           Specifies whether the photon inde should be displayed on a seperate plot pane. Default = False
-        extension (str):            Specifies whether the format of the saved plot image. Default = 'png''
+        axes (list):                The flux pane, followed by the TS and photon index panes if plotTS and plotIndex are enabled
 
     Returns:
-        None
+        The flux plot pane
 
     """
     
+    # Calculate the median flux from every detection so that the y-axis range isn't affected by decimation or the x-axis range
+    median_flux = numpy.median(lightCurve.flux)
+
+    # Keep the time of the first bin so that the default x-axis range doesn't depend on the visible bins
+    first_met = numpy.min(lightCurve.met)
+
+    # Only draw the bins within the requested x-axis range
+    if xmin is not None or xmax is not None:
+        lightCurve = lightCurve.slice(*_getWindow(lightCurve.cadence, xmin, xmax, MET, useMJD))
+
     # Extract the source name
     source = lightCurve.source
 
@@ -155,27 +182,10 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
         dt = dt / 86400.0
         x_errors = (duration / 2.0) / 86400.0
 
-        # Create lists to store the converted time bins
-        MJDs = []
-        MJDs_detections = []
-        MJDs_upperlimits = []
-
         # Convert all of the time bins
-        for timebin in met:
-            MJDs.append(computeMJD(timebin))
-
-        # Convert time bins for the detections
-        for timebin in met_detections:
-            MJDs_detections.append(computeMJD(timebin))
-
-        # Convert time bins for the nondetections
-        for timebin in met_upperlimits:
-            MJDs_upperlimits.append(computeMJD(timebin))
-
-        # Vectorize the arrays
-        timebins = numpy.array(MJDs)
-        timebins_detections = numpy.array(MJDs_detections)
-        timebins_upperlimits = numpy.array(MJDs_upperlimits)
+        timebins = computeMJDs(met)
+        timebins_detections = computeMJDs(met_detections)
+        timebins_upperlimits = computeMJDs(met_upperlimits)
 
         # Convert the triggerMET if no triggerMJD was specified
         if triggerMET == True and triggerMJD == False:
@@ -198,40 +208,50 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
             timebins_upperlimits = timebins_upperlimits - MET
 
 
-    # Create two subplots sharing the x axes
-    if plotTS == True and plotIndex == True:
-        f, (ax, ax2, ax3) = plot.subplots(3, sharex=True, sharey=False, figsize=[18,12])
-    elif plotTS == False and plotIndex == True:
-        f, (ax, ax3) = plot.subplots(2, sharex=True, sharey=False, figsize=[18,9])
-    elif plotTS == True and plotIndex == False:
-        f, (ax, ax2) = plot.subplots(2, sharex=True, sharey=False, figsize=[18,9])
-    elif plotTS == False and plotIndex == False:
-        f, (ax) = plot.subplots(1, sharex=True, sharey=False, figsize=[18,6])
+    # Assign the plot panes
+    ax = axes[0]
+    if plotTS == True:
+        ax2 = axes[1]
+    if plotIndex == True:
+        ax3 = axes[-1]
 
     # Adjust the two plots so that there is no space between them
     # if plotTS == True or plotIndex == True:
     #     f.subplots_adjust(hspace=0)
 
+    # Determine the number of pixel columns spanned by the data for decimation
+    n_columns = max(int(ax.get_window_extent().width), 1)
+    x_range = (numpy.min(timebins), numpy.max(timebins)) if len(timebins) > 0 else (0.0, 1.0)
+
+    def select(x, y):
+        # Keep only the extreme points within each pixel column if decimation is enabled
+        if decimate == True:
+            return _decimate(x, y, n_columns, x_range)
+        return slice(None)
+
+    detections = select(timebins_detections, flux)
+    upperlimits = select(timebins_upperlimits, flux_upper_limit)
+
     # Plot the flux values
-    ax.scatter(timebins_detections, flux, marker='o', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5)
+    ax.scatter(timebins_detections[detections], flux[detections], marker='o', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5)
 
     # Plot the upper limits
-    ax.scatter(timebins_upperlimits, flux_upper_limit, marker='v', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5, alpha=0.6)
+    ax.scatter(timebins_upperlimits[upperlimits], flux_upper_limit[upperlimits], marker='v', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5, alpha=0.6)
 
     # Don't let the error bars affect the plot scale
     ax.set_autoscale_on(False)
 
     # Plot the error bars
-    ax.errorbar(timebins_detections, flux, xerr=x_errors, yerr=numpy.transpose(flux_error), fmt='none', markersize=5, color='#3e4d8b', ecolor='#3e4d8b', markeredgecolor='black', label=label, capsize=0, alpha=0.6)
+    _errorbar(ax, timebins_detections[detections], flux[detections], x_errors, flux_error[detections], collection=decimate, label=label)
 
     # Set the y-axis range
     if ylog == True:
-        ymax=numpy.median(flux)*100
-        ymin=numpy.median(flux)/100
+        ymax=median_flux*100
+        ymin=median_flux/100
         ax.set_ylim(ymin, ymax)
 
     elif ymin is None and ymax is None:
-        ymax=numpy.median(flux)*10
+        ymax=median_flux*10
         ymin=0
         ax.set_ylim(ymin, ymax)
 
@@ -241,7 +261,7 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
 
     # Calculate the x-axis range
     if xmin is None:
-        xmin = min(tmin)
+        xmin = first_met - duration
         if useMJD is True:
             xmin = computeMJD(xmin)
 
@@ -272,7 +292,7 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
         if ylim is not None:
             ax.set_ylim(ylim)
         else:
-            ax.set_ylim(bottom=numpy.median(flux/100))
+            ax.set_ylim(bottom=median_flux/100)
 
     # Annotate the MET of interest
     if triggerMET is not None:
@@ -305,8 +325,9 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
 
     # Create the TS plot pane
     if plotTS == True:
-        ax2.scatter(timebins, ts, marker='o', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5)
-        ax2.errorbar(timebins, ts, xerr=x_errors, yerr=numpy.zeros(len(ts)), fmt='none', markersize=5, color='#3e4d8b', ecolor='#3e4d8b', markeredgecolor='black', capsize=0, alpha=0.6)
+        bins = select(timebins, ts)
+        ax2.scatter(timebins[bins], ts[bins], marker='o', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5)
+        _errorbar(ax2, timebins[bins], ts[bins], x_errors, numpy.zeros(len(ts))[bins], collection=decimate)
 
         ax2.set_ylabel('TS')
 
@@ -320,8 +341,9 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
 
     # Create the photon index plot pane
     if plotIndex == True:
-        ax3.scatter(timebins_detections, photon_index, marker='o', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5)
-        ax3.errorbar(timebins_detections, photon_index, xerr=x_errors, yerr=photon_index_error, fmt='none', markersize=5, color='#3e4d8b', ecolor='#3e4d8b', markeredgecolor='black', capsize=0, alpha=0.6)
+        indices = select(timebins_detections, photon_index)
+        ax3.scatter(timebins_detections[indices], photon_index[indices], marker='o', s=25, edgecolors='black', color='#3e4d8b', linewidths=0.5)
+        _errorbar(ax3, timebins_detections[indices], photon_index[indices], x_errors, photon_index_error[indices], collection=decimate)
 
         # Set the y-label
         ax3.set_ylabel(r'$\Gamma$')
@@ -335,6 +357,54 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
         # Set the format of the y-axis to scientific notation
         ax3.yaxis.set_major_formatter(mtick.FormatStrFormatter('%.1f'))
 
+    return ax
+
+##########################################################################################
+
+def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=None, triggerMET=None, triggerMJD=None, ylog=False, xlog=False, ymin=None, \
+    ymax=None, xmin=None, xmax=None, removeTicks=1, savefig=False, showPlot=True, plotTS=False, plotIndex=False, extension='.png', decimate=False):
+    """Plot data from the light curve repository
+
+    Arguments:
+        lightCurveData (Obj):       An instance of the LightCurve class            
+        logCenter (BOOL):           Whether to use logarithmic bin centers. Default = False         
+        MET (int):                  Reference MET. Default = None
+        useMJD (BOOL):              Specifies whether the y-axis should be in units of MJD. Default = False
+        ylim (list):                Specifies a limit on the y-axis
+        triggerMET (int):           Specifies a trigger MET to highlight on the plot. Default = None
+        triggerMJD (int):           Specifies a trigger MJD to highlight on the plot. Default = None
+        ylog (BOOL):                Enables y-axis logarithmic scaling. Default = False
+        xlog (BOOL):                Enables c-axis logarithmic scaling. Default = False
+        ymin (float):               Specifies a lower limit on the y-axis. Default = None
+        ymax (float):               Specifies a upper limit on the y-axis. Default = None
+        xmin (float):               Specifies a lower limit on the x-axis. Default = None
+        xmax (float):               Specifies an upper limit on the x-axis. Default = None
+        removeTicks (int):          Specifies the number of ticks to remove from the y-axis on multi-axis plots, Default = 1
+        savefig (BOOL):             Specifies whether the plot should be saved to disk. Default = False
+        showPlot (BOOL):            Specifies whether the plot should be displayed to screen. Default = True
+        plotTS (BOOL):              Specifies whether the TS should be displayed on a seperate plot pane. Default = False
+        plotIndex (BOOL):           Specifies whether the photon inde should be displayed on a seperate plot pane. Default = False
+        extension (str):            Specifies whether the format of the saved plot image. Default = 'png''
+        decimate (BOOL):            Only draw the points with the minimum and maximum values within each pixel column, preserving flares and upper limit envelopes. Default = False
+
+    Returns:
+        None
+
+    """
+
+    start = time.perf_counter()
+
+    # Create two subplots sharing the x axes
+    nrows, figsize = _getLayout(plotTS, plotIndex)
+    f, axes = plot.subplots(nrows, sharex=True, sharey=False, figsize=figsize, squeeze=False)
+
+    ax = _drawLightCurve(axes[:,0], lightCurve, logCenter=logCenter, MET=MET, useMJD=useMJD, ylim=ylim, triggerMET=triggerMET, triggerMJD=triggerMJD, \
+        ylog=ylog, xlog=xlog, ymin=ymin, ymax=ymax, xmin=xmin, xmax=xmax, plotTS=plotTS, plotIndex=plotIndex, \
+        decimate=decimate)
+
+    # Extract the source name and cadence
+    source = lightCurve.source
+    cadence = lightCurve.cadence
 
     if savefig == True:
 
@@ -345,9 +415,11 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
         filename = 'photon_flux_' + source_underscore + '_' + cadence + extension
 
         # Save the plot
-        print('\nSaving photon flux plot to:\n%s' % filename)
+        logger.info('\nSaving photon flux plot to:\n%s' % filename)
         plot.savefig(filename, bbox_inches='tight', dpi=96)
 
+    emit('plot', source=source, duration=time.perf_counter() - start, bins=len(lightCurve.met), panes=nrows)
+
     # Show the plot
     if showPlot == True:
         plot.show()
@@ -358,4 +430,111 @@ def plotLightCurve(lightCurve, logCenter=False, MET=None, useMJD=False, ylim=Non
 
 ##########################################################################################
 
+class _Renderer():
+    """
+    Renders light curves onto Agg figures that are created once for each combination of plot panes and
+    reused for every subsequent light curve, without involving pyplot
+
+    """
+
+    def __init__(self, dpi=96):
+        self.dpi = dpi
+        self.figures = {}
+
+    def render(self, lightCurve, filename, plotTS=False, plotIndex=False, **kwargs):
+
+        key = (plotTS, plotIndex)
+
+        # Create the figure template the first time this layout is requested
+        if key not in self.figures:
+            nrows, figsize = _getLayout(plotTS, plotIndex)
+            figure = Figure(figsize=figsize)
+            FigureCanvasAgg(figure)
+            axes = figure.subplots(nrows, sharex=True, sharey=False, squeeze=False)[:,0]
+            self.figures[key] = (figure, axes)
+
+        figure, axes = self.figures[key]
+
+        # Clear the previous light curve
+        for axis in axes:
+            axis.cla()
 
+        _drawLightCurve(axes, lightCurve, plotTS=plotTS, plotIndex=plotIndex, **kwargs)
+
+        figure.savefig(filename, bbox_inches='tight', dpi=self.dpi)
+
+
+# The renderer used by each batch rendering process
+_renderer = None
+
+
+def _renderWorker(task):
+    """Render a single light curve in a batch rendering process
+
+    """
+
+    global _renderer
+
+    item, directory, extension, dpi, kwargs = task
+
+    if _renderer is None:
+        _renderer = _Renderer(dpi=dpi)
+
+    # Light curves can be passed as LightCurve objects or as paths written by LightCurve.save
+    lightCurve = _loadItem(item)
+
+    filename = os.path.join(directory, 'photon_flux_' + lightCurve.source.replace(' ', '_') + '_' + lightCurve.cadence + extension)
+    _renderer.render(lightCurve, filename, **kwargs)
+
+    return lightCurve.source, filename
+
+##########################################################################################
+
+def renderLightCurves(lightCurves, directory='.', processes=None, extension='.png', dpi=96, **kwargs):
+    """Render many light curves to image files using reusable figures and a pool of processes
+
+    Arguments:
+        lightCurves (list):         A list or dictionary of LightCurve objects, or of paths written by LightCurve.save
+        directory (str):            The directory in which to save the images. Default = '.'
+        processes (int):            The number of rendering processes, with 1 rendering in the current process. Default = the number of CPUs
+        extension (str):            Specifies the format of the saved plot images. Default = '.png'
+        dpi (int):                  The resolution of the saved plot images. Default = 96
+        **kwargs:                   Additional plotting options accepted by plotLightCurve, e.g. plotTS, plotIndex, useMJD, ylog, except
+                                    for removeTicks, savefig and showPlot, which don't apply to rendered images
+
+    Returns:
+        A dictionary of image filenames keyed by source name, and a dictionary of error messages keyed by the name
+        or path of each light curve that could not be rendered
+
+    """
+
+    # Reject unsupported options once rather than failing to render every light curve
+    options = list(inspect.signature(_drawLightCurve).parameters)[2:]
+    unsupported = [name for name in kwargs if name not in options]
+
+    if len(unsupported) > 0:
+        raise TypeError("renderLightCurves() got unsupported plotting options: %s. Supported options are: %s" %
+            (', '.join(unsupported), ', '.join(options)))
+
+    if isinstance(lightCurves, dict):
+        lightCurves = list(lightCurves.values())
+
+    os.makedirs(directory, exist_ok=True)
+
+    items = [item for item in lightCurves if item is not None]
+    tasks = [(item, directory, extension, dpi, kwargs) for item in items]
+
+    filenames = {}
+    errors = {}
+
+    # Recycle the worker processes periodically to keep their memory bounded
+    for item, (result, error) in zip(items, _runBatch(_renderWorker, tasks, processes, maxtasksperchild=250)):
+        if error is None:
+            source, filename = result
+            filenames[source] = filename
+        else:
+            errors[getattr(item, 'source', item)] = error
+
+    return filenames, errors
+
+##########################################################################################
@@ -0,0 +1,307 @@
+import time
+import heapq
+import threading
+import itertools
+import collections
+import concurrent.futures
+
+import numpy
+
+from .Sources import catalog
+from .TimeTools import getCurrentUTCMET
+from .TimeTools import cadence_seconds
+from .DataTools import LCRError
+from .DataTools import _fetchLightCurve
+from .EventTools import logger
+from .EventTools import emit
+
+##########################################################################################
+
+# The typical delay in seconds between the end of a time bin and its appearance in the repository
+default_latency = {'daily': 21_600, 'weekly': 43_200, 'monthly': 86_400}
+
+# The interval between checks for a bin that is overdue, as a fraction of the cadence
+default_retry_fraction = 0.125
+
+# The longest time in seconds that the scheduler sleeps before checking whether it has been stopped
+max_sleep = 1.0
+
+##########################################################################################
+
+class LightCurveMonitor():
+    """
+    A long-running scheduler that keeps the light curves of many sources up to date with a minimum number of
+    requests. Each light curve is only requested again once its next time bin is expected to have been added
+    to the repository, i.e. after the following bin has ended and the processing latency has passed, and
+    overdue bins are checked for at a fraction of the cadence. When several light curves are due at once, the
+    sources with the highest recent TS are requested first, and the total number of requests is limited to
+    max_requests per period. The callback is called with the updated light curve and the number of new bins
+    whenever new bins are found.
+
+    """
+
+    def __init__(self, sources=None, cadences=('daily',), flux_type='photon', index_type='fixed', ts_min=4, callback=None,
+        max_requests=600, period=3600, max_workers=4, activity_window=30, latency=None, retry_fraction=default_retry_fraction,
+        notify_initial=False, clock=getCurrentUTCMET):
+        """
+        Arguments:
+            sources (list):         A list of 4FGL catalog names. Default = None, which monitors every source tracked by the LCR
+            cadences (list):        The cadences to monitor. Default = ('daily',)
+            flux_type (str):        Specifies the requested flux type. Options include 'photon' and 'energy'
+            index_type (str):       Specifies the spectral index freedom during fit. Options include 'free' and 'fixed'
+            ts_min (int):           The minimum likelihood ratio test statistic for which a flux estimate is reported as opposed to an upper limit.
+            callback (function):    A function called as callback(lightCurve, new_bins) when new bins are found. Default = None
+            max_requests (int):     The maximum number of requests sent to the repository in each period. Default = 600
+            period (float):         The length of the request budget period in seconds. Default = 3600
+            max_workers (int):      The maximum number of concurrent requests. Default = 4
+            activity_window (int):  The number of recent bins whose maximum TS sets the priority of a source. Default = 30
+            latency (dict):         The expected delay in seconds between the end of a bin and its availability for each cadence
+            retry_fraction (float): The interval between checks for an overdue bin, as a fraction of the cadence. Default = 0.125
+            notify_initial (BOOL):  Call the callback with the complete light curves retrieved by the first request. Default = False
+            clock (function):       A function returning the current MET. Default = pyLCR.getCurrentUTCMET
+
+        """
+
+        if sources is None:
+            sources = catalog.names
+
+        self.flux_type = flux_type
+        self.index_type = index_type
+        self.ts_min = ts_min
+        self.callback = callback
+        self.max_requests = max_requests
+        self.period = period
+        self.max_workers = max_workers
+        self.activity_window = activity_window
+        self.retry_fraction = retry_fraction
+        self.notify_initial = notify_initial
+        self.clock = clock
+
+        self.latency = dict(default_latency)
+        if latency is not None:
+            self.latency.update(latency)
+
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+        # The most recent light curve and the priority of each (source, cadence) pair
+        self.lightCurves = {}
+        self.priority = {}
+
+        # The light curves waiting for their next due time, and those that are due, as heaps
+        self.sequence = itertools.count()
+        self.pending = []
+        self.ready = []
+
+        # The times of the requests made within the current budget period
+        self.requests = collections.deque()
+
+        now = self.clock()
+        for cadence in cadences:
+            for source in dict.fromkeys(sources):
+                self.priority[(source, cadence)] = 0.0
+                heapq.heappush(self.pending, (now, next(self.sequence), (source, cadence)))
+
+    def get_light_curve(self, source, cadence='daily'):
+        """
+        Return the most recent light curve of a source, or None if it hasn't been retrieved yet
+
+        """
+
+        with self.lock:
+            return self.lightCurves.get((source, cadence))
+
+    def get_next_due(self):
+        """
+        Return a list of (MET, source, cadence) tuples giving the time at which each light curve is next requested, in time order
+
+        """
+
+        with self.lock:
+            due = [(met, key[0], key[1]) for met, sequence, key in self.pending]
+            due += [(met, key[0], key[1]) for priority, met, sequence, key in self.ready]
+
+        return sorted(due)
+
+    def _get_activity(self, lightCurve):
+        """
+        Return the maximum TS of the most recent bins of a light curve
+
+        """
+
+        ts = lightCurve.ts[-self.activity_window:]
+
+        return float(numpy.nanmax(ts)) if len(ts) > 0 and not numpy.all(numpy.isnan(ts)) else 0.0
+
+    def _get_due(self, lightCurve, cadence, now):
+        """
+        Return the MET at which the next bin of a light curve is expected to be available
+
+        """
+
+        retry = now + self.retry_fraction * cadence_seconds[cadence]
+
+        if lightCurve is None or len(lightCurve.met) == 0:
+            return retry
+
+        # The METs are bin centers, so the following bin ends one and a half bins after the last one
+        expected = numpy.max(lightCurve.met) + 1.5 * cadence_seconds[cadence] + self.latency[cadence]
+
+        return expected if expected > now else retry
+
+    def _take_budget(self, now):
+        """
+        Record a request if the budget allows it, returning whether the request can be made
+
+        """
+
+        while len(self.requests) > 0 and self.requests[0] <= now - self.period:
+            self.requests.popleft()
+
+        if len(self.requests) >= self.max_requests:
+            return False
+
+        self.requests.append(now)
+
+        return True
+
+    def _poll(self, key):
+        """
+        Request a light curve, record it, schedule its next request and report any new bins
+
+        """
+
+        source, cadence = key
+        start = time.perf_counter()
+
+        with self.lock:
+            previous = self.lightCurves.get(key)
+
+        lightCurve = None
+        new_bins = 0
+
+        try:
+            lightCurve = _fetchLightCurve(source, cadence, self.flux_type, self.index_type, self.ts_min, use_cache=False)
+
+            if previous is not None and len(previous.met) > 0:
+                new_bins = int(numpy.count_nonzero(lightCurve.met > numpy.max(previous.met)))
+            else:
+                new_bins = len(lightCurve.met)
+
+            with self.lock:
+                self.lightCurves[key] = lightCurve
+                self.priority[key] = self._get_activity(lightCurve)
+
+        except LCRError as e:
+            logger.warning("Unable to update %s (%s): %s" % (source, cadence, str(e).strip()))
+            lightCurve = None
+            new_bins = 0
+
+        except Exception:
+            logger.exception("Unable to update %s (%s)" % (source, cadence))
+            lightCurve = None
+            new_bins = 0
+
+        finally:
+            # Always schedule the next request, so that a failure never drops a light curve from the monitor
+            with self.lock:
+                due = self._get_due(lightCurve if lightCurve is not None else previous, cadence, self.clock())
+                heapq.heappush(self.pending, (due, next(self.sequence), key))
+
+        emit('poll', source=source, cadence=cadence, new_bins=new_bins, duration=time.perf_counter() - start)
+
+        if self.callback is not None and new_bins > 0 and (previous is not None or self.notify_initial == True):
+            try:
+                self.callback(lightCurve, new_bins)
+            except Exception:
+                logger.exception("The monitor callback failed for %s (%s)" % (source, cadence))
+
+    def run(self, duration=None):
+        """
+        Keep the light curves up to date until stop is called or the given duration has passed
+
+        Arguments:
+            duration (float):       The number of seconds to run for. Default = None, which runs until stop is called
+
+        Returns:
+            None
+
+        """
+
+        self.stopping.clear()
+        self._run(duration)
+
+    def _run(self, duration=None):
+        """
+        The scheduling loop, see run
+
+        """
+
+        end = self.clock() + duration if duration is not None else None
+
+        running = set()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            while not self.stopping.is_set():
+
+                now = self.clock()
+                if end is not None and now >= end:
+                    break
+
+                with self.lock:
+
+                    # Order the light curves that are due by priority
+                    while len(self.pending) > 0 and self.pending[0][0] <= now:
+                        due, sequence, key = heapq.heappop(self.pending)
+                        heapq.heappush(self.ready, (-self.priority[key], due, sequence, key))
+
+                    # Start as many requests as the workers and the budget allow
+                    while len(self.ready) > 0 and len(running) < self.max_workers and self._take_budget(now):
+                        priority, due, sequence, key = heapq.heappop(self.ready)
+                        running.add(executor.submit(self._poll, key))
+
+                    # Sleep until the next light curve is due or the budget allows another request
+                    wake = [end] if end is not None else []
+                    if len(self.pending) > 0:
+                        wake.append(self.pending[0][0])
+                    if len(self.ready) > 0 and len(self.requests) >= self.max_requests:
+                        wake.append(self.requests[0] + self.period)
+
+                timeout = min([max_sleep] + [max(met - now, 0) for met in wake])
+
+                if len(running) > 0:
+                    done, running = concurrent.futures.wait(running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                else:
+                    self.stopping.wait(timeout)
+
+            # Let the requests that have already started finish
+            concurrent.futures.wait(running)
+
+    def start(self):
+        """
+        Run the monitor in a background thread
+
+        """
+
+        self.stopping.clear()
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        Stop the monitor, waiting for any requests in progress to finish
+
+        """
+
+        self.stopping.set()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+##########################################################################################
@@ -1,5 +1,8 @@
 """4FGL-DR2 sources with a variability index >= 21.67."""
 
+import re
+import numpy
+
 sources = ['4FGL J0001.2-0747', '4FGL J0001.5+2113', '4FGL J0003.3-1928',
  '4FGL J0004.3+4614', '4FGL J0004.4-4737', '4FGL J0004.4-4001',
  '4FGL J0005.9+3824', '4FGL J0007.7+4008', '4FGL J0009.1-5012',
@@ -508,4 +511,114 @@ sources = ['4FGL J0001.2-0747', '4FGL J0001.5+2113', '4FGL J0003.3-1928',
  '4FGL J2352.0+1750', '4FGL J2353.2+3135', '4FGL J2355.2-5247',
  '4FGL J2355.7-3351', '4FGL J2357.8-5311', '4FGL J2358.0-4601',
  '4FGL J2358.3-1021', '4FGL J2358.3+3830', '4FGL J2359.0+3922',
- '4FGL J2359.2-3134']
\ No newline at end of file
+ '4FGL J2359.2-3134']
+
+
+class SourceCatalog():
+    """
+    An indexed catalog of the sources tracked by the LCR, supporting constant time membership tests,
+    lookups that are tolerant of spacing and case, and cone searches using the coordinates encoded in
+    the 4FGL names
+
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.name_set = frozenset(self.names)
+        self.normalized_names = {self.normalize(name): name for name in self.names}
+
+        # Parse the coordinates from the J-names
+        coordinates = numpy.array([self.parse_coordinates(name) for name in self.names], dtype=numpy.float64).reshape(-1, 2)
+        self.ra = coordinates[:,0]
+        self.dec = coordinates[:,1]
+
+    def __contains__(self, name):
+        return name in self.name_set
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def normalize(name):
+        """
+        Return a normalized version of a source name, ignoring case, spaces and underscores and the '4FGL' prefix
+
+        """
+
+        name = re.sub(r'[\s_]', '', name).upper()
+
+        if name.startswith('4FGL'):
+            name = name[4:]
+
+        return name
+
+    @staticmethod
+    def parse_coordinates(name):
+        """
+        Return the J2000 right ascension and declination in degrees encoded in a 4FGL name, e.g. '4FGL J0001.2-0747'
+
+        """
+
+        match = re.search(r'J(\d{2})(\d{2}\.\d)([+-])(\d{2})(\d{2})', name)
+
+        if match is None:
+            return numpy.nan, numpy.nan
+
+        hours, minutes, sign, degrees, arcminutes = match.groups()
+
+        ra = (int(hours) + float(minutes) / 60.0) * 15.0
+        dec = int(degrees) + int(arcminutes) / 60.0
+        if sign == '-':
+            dec = -dec
+
+        return ra, dec
+
+    def lookup(self, name):
+        """
+        Return the catalog name matching the given source name, or None if the source isn't tracked by the LCR
+
+        Arguments:
+            name (str):             A source name, e.g. '4FGL J0001.2-0747', '4fgl j0001.2-0747' or 'J0001.2-0747'
+
+        Returns:
+            The catalog name or None
+
+        """
+
+        if name in self.name_set:
+            return name
+
+        return self.normalized_names.get(self.normalize(name))
+
+    def cone_search(self, ra, dec, radius):
+        """
+        Find the sources within a given angular distance of a position
+
+        Arguments:
+            ra (float):             The right ascension of the search center in degrees
+            dec (float):            The declination of the search center in degrees
+            radius (float):         The search radius in degrees
+
+        Returns:
+            A list of catalog names, ordered by their distance from the search center
+
+        """
+
+        ra0, dec0 = numpy.radians(ra), numpy.radians(dec)
+        ra1, dec1 = numpy.radians(self.ra), numpy.radians(self.dec)
+
+        # Calculate the angular separations using the haversine formula
+        a = numpy.sin((dec1 - dec0) / 2.0)**2 + numpy.cos(dec0) * numpy.cos(dec1) * numpy.sin((ra1 - ra0) / 2.0)**2
+        separation = numpy.degrees(2.0 * numpy.arcsin(numpy.sqrt(numpy.clip(a, 0.0, 1.0))))
+
+        matches = numpy.where(separation <= radius)[0]
+        matches = matches[numpy.argsort(separation[matches], kind='stable')]
+
+        return [self.names[index] for index in matches]
+
+
+# The indexed catalog of the sources tracked by the LCR
+catalog = SourceCatalog(sources)
@@ -0,0 +1,182 @@
+import re
+import json
+import numpy
+
+##########################################################################################
+
+# Replaces the json array delimiters with whitespace so that the numbers can be split apart
+_delimiters = bytes.maketrans(b'[],', b'   ')
+
+# Matches the key of the next member of the top level json object
+_key_pattern = re.compile(rb'\s*[{,]?\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+
+# Matches a complete scalar member value, i.e. a string, number, boolean or null followed by a delimiter
+_scalar_pattern = re.compile(rb'(?:"(?:[^"\\]|\\.)*"|[^,}\s"]+)(?=\s*[,}])')
+
+# The characters that can appear in an array of numbers and nulls
+_numeric_characters = b'0123456789.+-eEnul[], \t\r\n'
+
+# Matches the characters that indicate a non-integer number
+_float_pattern = re.compile(rb'[.eEn]')
+
+##########################################################################################
+
+class ArrayStreamDecoder():
+    """
+    An incremental decoder for json objects whose members are numeric arrays, such as the light curve
+    data returned by the repository. Chunks of the raw response are passed to feed as they arrive and
+    each array is converted directly into a numpy array, so neither the complete response nor a Python
+    object tree is ever held in memory. Arrays of [met, value, ...] rows become 2D arrays and flat lists
+    become 1D arrays, with null values converted to NaN.
+
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.buffer = b''
+        self.finished = False
+
+        # The state of the array that is currently being decoded
+        self.key = None
+        self.depth = 0
+        self.rows = 0
+        self.values = []
+        self.integer = True
+
+    def feed(self, chunk):
+        """
+        Decode a chunk of the raw json
+
+        """
+
+        buffer = self.buffer + chunk if self.buffer else chunk
+        position = 0
+
+        while position < len(buffer) and self.finished == False:
+
+            if self.key is None:
+                position, complete = self._readKey(buffer, position)
+            else:
+                position, complete = self._readArray(buffer, position)
+
+            if complete == False:
+                break
+
+        # Keep any incomplete token for the next chunk
+        self.buffer = buffer[position:]
+
+    def close(self):
+        """
+        Finish decoding and return a dictionary of numpy arrays
+
+        """
+
+        if self.finished == False and (self.key is not None or self.buffer.strip() not in [b'', b'}']):
+            raise ValueError("Incomplete json data")
+
+        return self.data
+
+    def _readKey(self, buffer, position):
+        """
+        Read the key of the next member of the top level object, and its value if it's a scalar
+
+        """
+
+        start = position
+
+        if buffer[position:].strip() in [b'}', b'{}']:
+            self.finished = True
+            return len(buffer), True
+
+        match = _key_pattern.match(buffer, position)
+
+        # Wait for the rest of the key and the first character of its value
+        if match is None or match.end() >= len(buffer):
+            return start, False
+
+        key = match.group(1).decode()
+        position = match.end()
+
+        if buffer[position:position+1] == b'[':
+            self.key = key
+            self.depth = 0
+            self.rows = 0
+            self.values = []
+            self.integer = True
+            return position, True
+
+        # Scalar values are decoded with the json module
+        match = _scalar_pattern.match(buffer, position)
+        if match is None:
+            return start, False
+
+        self.data[key] = json.loads(match.group(0))
+
+        return match.end(), True
+
+    def _readArray(self, buffer, position):
+        """
+        Convert the numbers of the current array up to its end or the last complete number in the buffer
+
+        """
+
+        segment = numpy.frombuffer(buffer, dtype=numpy.uint8, offset=position)
+
+        # Track the bracket depth to find the end of the array and count the rows
+        opens = segment == ord('[')
+        closes = segment == ord(']')
+        depth = self.depth + numpy.cumsum(opens.astype(numpy.int64) - closes)
+
+        ends = numpy.flatnonzero(closes & (depth == 0))
+
+        if len(ends) > 0:
+            end = int(ends[0]) + 1
+            complete = True
+        else:
+            # Stop after the last delimiter so that a number isn't split between chunks
+            delimiters = numpy.flatnonzero(opens | closes | (segment == ord(',')))
+            if len(delimiters) == 0:
+                return position, False
+            end = int(delimiters[-1]) + 1
+            complete = False
+
+        self.rows += int(numpy.count_nonzero(opens[:end] & (depth[:end] == 2)))
+        self.depth = int(depth[end-1])
+
+        text = buffer[position:position+end]
+
+        if self.integer == True and _float_pattern.search(text):
+            self.integer = False
+
+        if text.translate(None, _numeric_characters):
+            raise ValueError("Non-numeric value in the '%s' array" % self.key)
+
+        text = text.replace(b'null', b'nan').translate(_delimiters).strip()
+
+        if text:
+            self.values.append(numpy.fromstring(text, dtype=numpy.float64, sep=' '))
+
+        if complete == True:
+            self._finishArray()
+
+        return position + end, True
+
+    def _finishArray(self):
+        """
+        Combine the converted numbers of the current array into a 1D or 2D numpy array
+
+        """
+
+        values = numpy.concatenate(self.values) if len(self.values) > 0 else numpy.array([])
+
+        if self.integer == True and len(values) > 0:
+            values = values.astype(numpy.int64)
+
+        if self.rows > 0:
+            values = values.reshape(self.rows, len(values) // self.rows)
+
+        self.data[self.key] = values
+        self.key = None
+        self.values = []
+
+##########################################################################################
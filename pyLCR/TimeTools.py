@@ -0,0 +1,187 @@
+import numpy
+import datetime
+import bisect
+
+##########################################################################################
+
+# The METs of the leap seconds since the start of the mission, in ascending order
+leap_seconds = [157766400,  # 2005 leap second
+                252460801,  # 2008 leap second
+                362793601,  # 2012 leap second
+                457401601,  # 2015 leap second
+                504921601]  # 2016 leap second
+
+# The MJD of the MET reference date, January 1, 2001
+mjd_reference = 51910
+
+# The MET of the start of the first light curve bin
+mission_start = 239557417
+
+# The length of the light curve bins for each cadence in seconds
+cadence_seconds = {'daily': 86400, 'weekly': 604800, 'monthly': 2592000}
+
+##########################################################################################
+
+def computeDate(MET):
+
+    # Remove the leap seconds that occurred before the given MET
+    MET = MET - bisect.bisect_left(leap_seconds, MET)
+    metdate  = datetime.datetime(2001, 1, 1,0,0,0)
+    dt=datetime.timedelta(seconds=MET)
+    date=metdate + dt
+    yy=date.year
+    mm=date.month
+    dd=date.day
+    hr=date.hour
+    mi=date.minute
+    ss=date.second
+    fff=(float(ss+60.*mi+3600.*hr)/86.4)/1000.0
+
+    return date, fff
+
+
+##########################################################################################
+
+def getCurrentMET():
+
+    date = datetime.datetime.now()
+    metdate = datetime.datetime(2001, 1, 1, 0, 0, 0)
+    difference=date-metdate
+    MET=(difference).days*86400.+(difference).seconds
+    if date.year>2005: MET+=1 # 2005 leap second
+    if date.year>2008: MET+=1 # 2008 leap second
+    if (date.month >= 7 and date.year == 2012) or (date.year > 2012): MET+=1 # 2012 leap second
+    if (date.month >= 7 and date.year == 2015) or (date.year > 2015): MET+=1 # 2015 leap second
+    if date.year>2016: MET+=1 # 2016 leap second
+
+    return MET
+
+##########################################################################################
+
+def computeMJD(MET, returnFraction=True):
+
+    # Get the date and fraction of day for the given MET
+    date, fraction = computeDate(MET)
+
+    # Calculate the number of days since January 1, 4713 BC
+    # JD = date.toordinal() + 1721424.5
+    JD = date.toordinal() + 1721425
+
+    # Calculate the number of days since November 17, 1858
+    # MJD = JD - 2400000.5
+    MJD = JD - 2400001
+
+    if returnFraction == True:
+        MJD = MJD + fraction
+
+    return MJD
+
+##########################################################################################
+
+def _removeLeapSeconds(MET):
+    """Convert an array of METs into integer microseconds since January 1, 2001, excluding leap seconds
+
+    """
+
+    MET = numpy.asarray(MET, dtype=numpy.float64)
+
+    # Remove the leap seconds that occurred before each MET
+    MET = MET - numpy.searchsorted(leap_seconds, MET, side='left')
+
+    # Round the fractional seconds to the nearest microsecond in the same way as datetime.timedelta
+    seconds = numpy.trunc(MET)
+    microseconds = numpy.round((MET - seconds) * 1e6)
+
+    return seconds.astype(numpy.int64) * 1_000_000 + microseconds.astype(numpy.int64)
+
+##########################################################################################
+
+def computeDates(MET):
+    """Convert an array of METs into dates and fractions of the day. This is the vectorized equivalent of computeDate.
+
+    Arguments:
+        MET (array):            An array of mission elapsed times
+
+    Returns:
+        A numpy datetime64 array of dates and an array of the fraction of the day of each date
+
+    """
+
+    microseconds = _removeLeapSeconds(MET)
+
+    dates = numpy.datetime64('2001-01-01T00:00:00', 'us') + microseconds.astype('timedelta64[us]')
+
+    # Calculate the fraction of the day in whole seconds
+    seconds = (microseconds % 86_400_000_000) // 1_000_000
+    fraction = (seconds / 86.4) / 1000.0
+
+    return dates, fraction
+
+##########################################################################################
+
+def computeMJDs(MET, returnFraction=True):
+    """Convert an array of METs into MJDs. This is the vectorized equivalent of computeMJD.
+
+    Arguments:
+        MET (array):            An array of mission elapsed times
+        returnFraction (BOOL):  Include the fraction of the day in the MJDs. Default = True
+
+    Returns:
+        An array of MJDs
+
+    """
+
+    microseconds = _removeLeapSeconds(MET)
+
+    # Calculate the number of days since January 1, 2001
+    days = microseconds // 86_400_000_000
+
+    MJD = days + mjd_reference
+
+    if returnFraction == True:
+        seconds = (microseconds % 86_400_000_000) // 1_000_000
+        MJD = MJD + (seconds / 86.4) / 1000.0
+
+    return MJD
+
+##########################################################################################
+
+def computeMET(MJD):
+    """Convert an MJD, or an array of MJDs, into mission elapsed times. This is the inverse of computeMJD.
+
+    Arguments:
+        MJD (float):            An MJD or an array of MJDs
+
+    Returns:
+        The mission elapsed time of each MJD
+
+    """
+
+    # Calculate the number of seconds since January 1, 2001, excluding leap seconds
+    seconds = (numpy.asarray(MJD, dtype=numpy.float64) - mjd_reference) * 86400.0
+
+    # Add the leap seconds that occurred before each time, where the time of each leap second excludes the earlier ones
+    # and coincides with the following midnight, which is already after the leap second. The times are compared to the
+    # microsecond, so that the rounding of an MJD doesn't move a time at midnight to before the leap second.
+    MET = seconds + numpy.searchsorted(numpy.array(leap_seconds) - numpy.arange(len(leap_seconds)), numpy.round(seconds, 6), side='right')
+
+    if numpy.ndim(MET) == 0:
+        return float(MET)
+
+    return MET
+
+##########################################################################################
+
+def getCurrentUTCMET():
+    """Return the current MET calculated from the UTC time, rather than the local time used by getCurrentMET
+
+    Returns:
+        The current mission elapsed time
+
+    """
+
+    # Calculate the number of days since January 1, 2001 in UTC
+    now = datetime.datetime.now(datetime.timezone.utc)
+    days = (now - datetime.datetime(2001, 1, 1, tzinfo=datetime.timezone.utc)).total_seconds() / 86400.0
+
+    return computeMET(mjd_reference + days)
@@ -0,0 +1,485 @@
+import math
+import numpy
+import warnings
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+##########################################################################################
+
+def bayesianBlocks(t, x, sigma, p0=0.05):
+    """Segment a series of point measurements into blocks of constant value using the Bayesian blocks
+    algorithm of Scargle et al. (2013). Each step of the dynamic program evaluates every candidate
+    change point at once using cumulative sums.
+
+    Arguments:
+        t (array):              The time of each measurement, in increasing order
+        x (array):              The measured values
+        sigma (array):          The 1-sigma uncertainty of each measurement
+        p0 (float):             The false alarm probability used to calibrate the prior on the number of blocks. Default = 0.05
+
+    Returns:
+        An array of the n+1 block edges and an array of the error-weighted mean value of each of the n blocks
+
+    """
+
+    t = numpy.asarray(t, dtype=numpy.float64)
+    x = numpy.asarray(x, dtype=numpy.float64)
+    sigma = numpy.asarray(sigma, dtype=numpy.float64)
+
+    n = len(t)
+
+    if n == 0:
+        return numpy.array([]), numpy.array([])
+
+    # The block fitness for point measurements, b^2 / 4a, is built from cumulative sums of these terms
+    weights = 1.0 / sigma**2
+    a = numpy.concatenate([[0.0], numpy.cumsum(0.5 * weights)])
+    b = numpy.concatenate([[0.0], numpy.cumsum(x * weights)])
+
+    # The prior on the number of change points
+    ncp_prior = 4 - numpy.log(73.53 * p0 * n**-0.478)
+
+    best = numpy.zeros(n)
+    last = numpy.zeros(n, dtype=numpy.int64)
+
+    for r in range(n):
+
+        # The fitness of a final block starting at each of the points 0 to r
+        block_a = a[r+1] - a[:r+1]
+        block_b = b[r+1] - b[:r+1]
+        fitness = block_b**2 / (4 * block_a) - ncp_prior
+        fitness[1:] += best[:r]
+
+        last[r] = numpy.argmax(fitness)
+        best[r] = fitness[last[r]]
+
+    # Walk back through the optimal partition to find the change points
+    change_points = [n]
+    index = n
+    while index > 0:
+        index = last[index-1]
+        change_points.append(index)
+    change_points = numpy.array(change_points[::-1])
+
+    # Place the block edges halfway between the measurements on either side of each change point
+    edges = numpy.concatenate([t[:1], 0.5 * (t[1:] + t[:-1]), t[-1:]])[change_points]
+
+    start = change_points[:-1]
+    stop = change_points[1:]
+    values = (b[stop] - b[start]) / (2 * (a[stop] - a[start]))
+
+    return edges, values
+
+##########################################################################################
+
+def findFlares(flux, sigma, window=30, threshold=3.0, min_points=None):
+    """Flag the bins whose flux exceeds a quiescent baseline, taken as the median flux of the
+    preceding bins, by more than a given number of standard deviations
+
+    Arguments:
+        flux (array):           The flux in each bin, with NaN for bins without a detection
+        sigma (array):          The 1-sigma uncertainty of the flux in each bin
+        window (int):           The number of preceding bins used to calculate the baseline. Default = 30
+        threshold (float):      The significance above the baseline that defines a flaring bin. Default = 3
+        min_points (int):       The minimum number of detections in the window required for a baseline. Default = window // 2
+
+    Returns:
+        A boolean array flagging the flaring bins and an array of the baseline flux in each bin
+
+    """
+
+    flux = numpy.asarray(flux, dtype=numpy.float64)
+    sigma = numpy.asarray(sigma, dtype=numpy.float64)
+
+    if min_points is None:
+        min_points = max(window // 2, 1)
+
+    # Build a view of the window preceding each bin without copying the data
+    padded = numpy.concatenate([numpy.full(window, numpy.nan), flux])
+    windows = sliding_window_view(padded, window)[:len(flux)]
+
+    # Windows without any detections have a NaN baseline
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        baseline = numpy.nanmedian(windows, axis=1)
+
+    baseline[numpy.count_nonzero(~numpy.isnan(windows), axis=1) < min_points] = numpy.nan
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        flaring = (flux - baseline) / sigma >= threshold
+
+    return flaring, baseline
+
+##########################################################################################
+
+def fractionalVariability(flux, sigma, axis=-1):
+    """Calculate the fractional variability amplitude (Vaughan et al. 2003) of one or more series of flux measurements
+
+    Arguments:
+        flux (array):           The flux measurements, with NaN for missing values
+        sigma (array):          The 1-sigma uncertainty of each measurement
+        axis (int):             The axis along which each series lies. Default = -1
+
+    Returns:
+        The fractional variability amplitude, with NaN for series with fewer than two measurements
+        or whose variance is smaller than the measurement errors
+
+    """
+
+    flux = numpy.asarray(flux, dtype=numpy.float64)
+    sigma = numpy.asarray(sigma, dtype=numpy.float64)
+
+    n = numpy.count_nonzero(~numpy.isnan(flux), axis=axis)
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        mean = numpy.nansum(flux, axis=axis) / n
+        variance = numpy.nansum((flux - numpy.expand_dims(mean, axis))**2, axis=axis) / (n - 1)
+        mean_error = numpy.nansum(numpy.where(numpy.isnan(flux), numpy.nan, sigma**2), axis=axis) / n
+        excess = variance - mean_error
+        fvar = numpy.sqrt(numpy.where(excess > 0, excess, numpy.nan)) / mean
+
+    return numpy.where(n < 2, numpy.nan, fvar)
+
+##########################################################################################
+
+def doublingTimes(t, flux, sigma, significance=3.0):
+    """Calculate the flux doubling or halving time between each pair of consecutive measurements whose
+    fluxes differ significantly
+
+    Arguments:
+        t (array):              The time of each measurement, in increasing order
+        flux (array):           The measured fluxes
+        sigma (array):          The 1-sigma uncertainty of each flux
+        significance (float):   The minimum significance of the flux difference. Default = 3
+
+    Returns:
+        An (n, 2) array of [time, doubling time] rows, where the time is the midpoint of each pair and the
+        doubling time is positive for a rising flux and negative for a decaying flux
+
+    """
+
+    t = numpy.asarray(t, dtype=numpy.float64)
+    flux = numpy.asarray(flux, dtype=numpy.float64)
+    sigma = numpy.asarray(sigma, dtype=numpy.float64)
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        difference = numpy.abs(numpy.diff(flux)) / numpy.sqrt(sigma[1:]**2 + sigma[:-1]**2)
+        tau = numpy.diff(t) * numpy.log(2) / numpy.log(flux[1:] / flux[:-1])
+
+    keep = (difference >= significance) & numpy.isfinite(tau)
+
+    return numpy.column_stack([0.5 * (t[1:] + t[:-1])[keep], tau[keep]])
+
+##########################################################################################
+
+def _extirpolate(x, y, n, m=4):
+    """Spread values at non-integer positions onto a regular grid of n points with Lagrange interpolation
+    weights over the m nearest grid points, so that sums of smooth functions over the grid reproduce the
+    same sums over the original positions (Press & Rybicki 1989)
+
+    """
+
+    result = numpy.zeros(n)
+
+    # Values that already lie on the grid are added directly
+    on_grid = x == numpy.round(x)
+    result += numpy.bincount(numpy.round(x[on_grid]).astype(numpy.int64) % n, y[on_grid], minlength=n)
+
+    x = x[~on_grid]
+    y = y[~on_grid]
+
+    start = numpy.clip((x - m // 2).astype(numpy.int64), 0, n - m)
+    numerator = y * numpy.prod(x - start - numpy.arange(m)[:,None], axis=0)
+    denominator = float(numpy.prod(numpy.arange(1, m)))
+
+    for j in range(m):
+        if j > 0:
+            denominator *= j / (j - m)
+        index = start + (m - 1 - j)
+        result += numpy.bincount(index, numerator / (denominator * (x - index)), minlength=n)
+
+    return result
+
+##########################################################################################
+
+def _trigSums(t, h, f0, df, n, factor=1, method='fast', oversampling=5, m=4):
+    """Calculate the sums of h*cos(2 pi f t) and h*sin(2 pi f t) over the measurements at each of the n frequencies
+    f = factor * (f0 + df * k). The fast method extirpolates the measurements onto a regular grid and evaluates
+    every frequency at once with an FFT, while the direct method evaluates each term in blocks of frequencies.
+
+    """
+
+    f0 = f0 * factor
+    df = df * factor
+
+    if method == 'direct':
+        C = numpy.empty(n)
+        S = numpy.empty(n)
+        block = max(2**22 // max(len(t), 1), 1)
+
+        for start in range(0, n, block):
+            frequency = f0 + df * numpy.arange(start, min(start + block, n))
+            phase = 2 * numpy.pi * frequency[:,None] * t
+            C[start:start+len(frequency)] = numpy.cos(phase) @ h
+            S[start:start+len(frequency)] = numpy.sin(phase) @ h
+
+        return C, S
+
+    n_fft = 2**int(numpy.ceil(numpy.log2(max(n * oversampling, m))))
+    t0 = numpy.min(t)
+
+    # Shift the frequencies to start at zero and the times to start at t0, which are restored after the FFT
+    h = h * numpy.exp(2j * numpy.pi * f0 * (t - t0))
+    position = ((t - t0) * n_fft * df) % n_fft
+
+    grid = _extirpolate(position, h.real, n_fft, m) + 1j * _extirpolate(position, h.imag, n_fft, m)
+    sums = n_fft * numpy.fft.ifft(grid)[:n]
+    sums *= numpy.exp(2j * numpy.pi * t0 * (f0 + df * numpy.arange(n)))
+
+    return sums.real, sums.imag
+
+##########################################################################################
+
+def lombScargle(t, y, sigma=None, minimum_frequency=None, maximum_frequency=None, samples_per_peak=5, method='fast'):
+    """Calculate the generalized Lomb-Scargle periodogram (Zechmeister & Kuerster 2009) of a series of measurements,
+    which fits a sinusoid and a constant offset at each frequency. The fast method evaluates the trigonometric
+    sums in O(N log N) time using the extirpolation technique of Press & Rybicki (1989).
+
+    Arguments:
+        t (array):                  The time of each measurement
+        y (array):                  The measured values
+        sigma (array):              The 1-sigma uncertainty of each measurement. Default = None, which weights every measurement equally
+        minimum_frequency (float):  The lowest frequency, in inverse units of t. Default = None, which uses the frequency spacing
+        maximum_frequency (float):  The highest frequency, in inverse units of t. Default = None, which uses half the inverse of the median sampling interval
+        samples_per_peak (int):     The number of frequencies across the width of a periodogram peak. Default = 5
+        method (str):               The method used to evaluate the periodogram. Options include 'fast' and 'direct'. Default = 'fast'
+
+    Returns:
+        An array of regularly spaced frequencies and an array of the periodogram power at each frequency, normalized to lie between 0 and 1
+
+    """
+
+    t = numpy.asarray(t, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    sigma = numpy.ones_like(y) if sigma is None else numpy.asarray(sigma, dtype=numpy.float64)
+
+    if len(t) < 3:
+        return numpy.array([]), numpy.array([])
+
+    # Create the frequency grid
+    df = 1.0 / (samples_per_peak * (numpy.max(t) - numpy.min(t)))
+
+    if minimum_frequency is None:
+        minimum_frequency = df
+
+    if maximum_frequency is None:
+        maximum_frequency = 0.5 / numpy.median(numpy.diff(numpy.sort(t)))
+
+    n = max(int(numpy.ceil((maximum_frequency - minimum_frequency) / df)) + 1, 1)
+    frequency = minimum_frequency + df * numpy.arange(n)
+
+    # Normalize the weights and remove the weighted mean
+    weights = sigma**-2
+    weights /= numpy.sum(weights)
+    y = y - numpy.dot(weights, y)
+
+    Ch, Sh = _trigSums(t, weights * y, minimum_frequency, df, n, method=method)
+    C2, S2 = _trigSums(t, weights, minimum_frequency, df, n, factor=2, method=method)
+    C, S = _trigSums(t, weights, minimum_frequency, df, n, method=method)
+
+    # Find the phase offset that makes the sine and cosine terms orthogonal, including the constant offset
+    tan_2omega_tau = (S2 - 2 * S * C) / (C2 - (C * C - S * S))
+    C2w = 1 / numpy.sqrt(1 + tan_2omega_tau**2)
+    S2w = tan_2omega_tau * C2w
+    Cw = numpy.sqrt(0.5 * (1 + C2w))
+    Sw = numpy.sign(S2w) * numpy.sqrt(0.5 * (1 - C2w))
+
+    YY = numpy.dot(weights, y**2)
+    YC = Ch * Cw + Sh * Sw
+    YS = Sh * Cw - Ch * Sw
+    CC = 0.5 * (1 + C2 * C2w + S2 * S2w) - (C * Cw + S * Sw)**2
+    SS = 0.5 * (1 - C2 * C2w - S2 * S2w) - (S * Cw - C * Sw)**2
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        power = (YC * YC / CC + YS * YS / SS) / YY
+
+    return frequency, power
+
+##########################################################################################
+
+def falseAlarmProbability(power, t, sigma=None, maximum_frequency=None):
+    """Estimate the probability that a periodogram calculated by lombScargle contains a peak at least as high as the
+    given power by chance, for measurements with white Gaussian noise, using the analytic approximation of Baluev (2008)
+
+    Arguments:
+        power (array):              The periodogram power of one or more peaks
+        t (array):                  The time of each measurement
+        sigma (array):              The 1-sigma uncertainty of each measurement. Default = None
+        maximum_frequency (float):  The highest frequency searched. Default = None, which uses the default of lombScargle
+
+    Returns:
+        The false alarm probability of each power
+
+    """
+
+    power = numpy.asarray(power, dtype=numpy.float64)
+    t = numpy.asarray(t, dtype=numpy.float64)
+    sigma = numpy.ones_like(t) if sigma is None else numpy.asarray(sigma, dtype=numpy.float64)
+
+    n = len(t)
+
+    if n < 4:
+        return numpy.full(power.shape, numpy.nan)
+
+    if maximum_frequency is None:
+        maximum_frequency = 0.5 / numpy.median(numpy.diff(numpy.sort(t)))
+
+    # The effective length of the observations from the weighted variance of the times
+    weights = sigma**-2
+    weights /= numpy.sum(weights)
+    effective_length = numpy.sqrt(4 * numpy.pi * (numpy.dot(weights, t**2) - numpy.dot(weights, t)**2))
+
+    power = numpy.clip(power, 0, 1)
+
+    # The probability of exceeding the power at a single frequency, and the expected number of upcrossings
+    single = (1 - power)**(0.5 * (n - 3))
+    gamma = numpy.sqrt(2.0 / (n - 1)) * numpy.exp(math.lgamma(0.5 * (n - 1)) - math.lgamma(0.5 * (n - 2)))
+    tau = gamma * maximum_frequency * effective_length * (1 - power)**(0.5 * (n - 4)) * numpy.sqrt(0.5 * (n - 1) * power)
+
+    return 1 - (1 - single) * numpy.exp(-tau)
+
+##########################################################################################
+
+def discreteCorrelation(t1, x1, sigma1, t2, x2, sigma2, max_lag, lag_width, method='dcf', min_pairs=11, block_size=2**22):
+    """Calculate the discrete cross-correlation function between two unevenly sampled series of measurements. Only the
+    pairs of measurements whose lag falls within the lag range are formed, using a binary search in the sorted times of
+    the second series, and they are binned in blocks so that the memory used is independent of the length of the series.
+
+    The 'dcf' method is the discrete correlation function of Edelson & Krolik (1988), normalized by the variance of each
+    series in excess of its measurement errors. The 'zdcf' method calculates the Pearson correlation of the pairs in each
+    lag bin from the means and variances of those pairs alone, with uncertainties from Fisher's z-transformation, as in the
+    z-transformed DCF of Alexander (1997), but using lag bins of a fixed width.
+
+    Arguments:
+        t1 (array):                 The time of each measurement of the first series
+        x1 (array):                 The measured values of the first series
+        sigma1 (array):             The 1-sigma uncertainty of each measurement of the first series, or None
+        t2 (array):                 The time of each measurement of the second series
+        x2 (array):                 The measured values of the second series
+        sigma2 (array):             The 1-sigma uncertainty of each measurement of the second series, or None
+        max_lag (float):            The largest lag, in units of t
+        lag_width (float):          The width of each lag bin, in units of t
+        method (str):               The correlation method. Options include 'dcf' and 'zdcf'. Default = 'dcf'
+        min_pairs (int):            The minimum number of pairs in a lag bin. Default = 11
+        block_size (int):           The maximum number of pairs binned at once. Default = 4194304
+
+    Returns:
+        An array of lags, where a positive lag means that the second series follows the first, an array of the correlation
+        in each lag bin, an (n, 2) array of the lower and upper 1-sigma bounds of each correlation, and an array of the number
+        of pairs in each lag bin. Bins with fewer than min_pairs pairs have a NaN correlation, as do all bins of the 'dcf'
+        method if the variance of either series is smaller than its measurement errors.
+
+    """
+
+    if method not in ['dcf', 'zdcf']:
+        raise ValueError("Unknown correlation method: %s" % method)
+
+    t1 = numpy.asarray(t1, dtype=numpy.float64)
+    x1 = numpy.asarray(x1, dtype=numpy.float64)
+    t2 = numpy.asarray(t2, dtype=numpy.float64)
+    x2 = numpy.asarray(x2, dtype=numpy.float64)
+
+    # Create the lag bins, centered on multiples of the bin width so that one is centered on zero lag
+    n_side = int(numpy.floor(max_lag / lag_width))
+    lag = lag_width * numpy.arange(-n_side, n_side + 1)
+    n_bins = len(lag)
+    lag_start = lag[0] - 0.5 * lag_width
+    lag_stop = lag[-1] + 0.5 * lag_width
+
+    # Standardize both series, which leaves the correlation unchanged and avoids round-off in the sums below
+    def standardize(x, sigma):
+        variance = numpy.var(x, ddof=1) if len(x) > 1 else 0.0
+        if not variance > 0:
+            return x, numpy.nan
+
+        # The variance in excess of the measurement errors, relative to the total variance
+        error = numpy.mean(numpy.asarray(sigma, dtype=numpy.float64)**2) if sigma is not None else 0.0
+
+        return (x - numpy.mean(x)) / numpy.sqrt(variance), (variance - error) / variance
+
+    a, excess1 = standardize(x1, sigma1)
+    b, excess2 = standardize(x2, sigma2)
+
+    order = numpy.argsort(t2, kind='stable')
+    t2 = t2[order]
+    b = b[order]
+
+    # Find the range of the second series that is paired with each measurement of the first
+    starts = numpy.searchsorted(t2, t1 + lag_start, side='left')
+    stops = numpy.searchsorted(t2, t1 + lag_stop, side='left')
+    counts = stops - starts
+
+    # The terms summed in each lag bin
+    def terms(a_pairs, b_pairs):
+        if method == 'dcf':
+            return [a_pairs * b_pairs, (a_pairs * b_pairs)**2]
+        return [a_pairs, b_pairs, a_pairs**2, b_pairs**2, a_pairs * b_pairs]
+
+    n_pairs = numpy.zeros(n_bins, dtype=numpy.int64)
+    sums = [numpy.zeros(n_bins) for index in range(2 if method == 'dcf' else 5)]
+
+    # Split the first series into blocks of rows that each form at most block_size pairs
+    cumulative = numpy.cumsum(counts)
+    boundaries = numpy.searchsorted(cumulative, numpy.arange(block_size, cumulative[-1] if len(cumulative) > 0 else 0, block_size), side='left')
+    boundaries = numpy.unique(numpy.concatenate([[0], boundaries, [len(t1)]]))
+
+    for row_start, row_stop in zip(boundaries[:-1], boundaries[1:]):
+
+        block_counts = counts[row_start:row_stop]
+        total = int(numpy.sum(block_counts))
+        if total == 0:
+            continue
+
+        # Index every pair in the block without a Python loop over the rows
+        rows = numpy.repeat(numpy.arange(row_start, row_stop), block_counts)
+        offsets = numpy.repeat(starts[row_start:row_stop] - (numpy.cumsum(block_counts) - block_counts), block_counts)
+        columns = offsets + numpy.arange(total)
+
+        bins = numpy.floor((t2[columns] - t1[rows] - lag_start) / lag_width).astype(numpy.int64)
+        bins = numpy.clip(bins, 0, n_bins - 1)
+
+        n_pairs += numpy.bincount(bins, minlength=n_bins)
+        for bin_sums, weights in zip(sums, terms(a[rows], b[columns])):
+            bin_sums += numpy.bincount(bins, weights, minlength=n_bins)
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+
+        if method == 'dcf':
+            # Average the unbinned correlations in each bin and estimate the error from their scatter
+            normalization = numpy.sqrt(excess1 * excess2) if excess1 > 0 and excess2 > 0 else numpy.nan
+            correlation = sums[0] / n_pairs / normalization
+            scatter = numpy.maximum(sums[1] / normalization**2 - n_pairs * correlation**2, 0)
+            error = numpy.sqrt(scatter) / (n_pairs - 1)
+            bounds = numpy.column_stack([correlation - error, correlation + error])
+
+        else:
+            # Correlate the pairs in each bin about their own means
+            mean_a = sums[0] / n_pairs
+            mean_b = sums[1] / n_pairs
+            covariance = sums[4] / n_pairs - mean_a * mean_b
+            variance_a = sums[2] / n_pairs - mean_a**2
+            variance_b = sums[3] / n_pairs - mean_b**2
+            correlation = numpy.clip(covariance / numpy.sqrt(variance_a * variance_b), -1, 1)
+
+            # Transform the correlation into an approximately normally distributed quantity to find its uncertainty
+            z = numpy.arctanh(correlation)
+            z_error = 1.0 / numpy.sqrt(n_pairs - 3)
+            bounds = numpy.column_stack([numpy.tanh(z - z_error), numpy.tanh(z + z_error)])
+
+    sparse = n_pairs < max(min_pairs, 2)
+    correlation[sparse] = numpy.nan
+    bounds[sparse] = numpy.nan
+
+    return lag, correlation, bounds, n_pairs
+
+##########################################################################################
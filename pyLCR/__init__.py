@@ -19,16 +19,71 @@
 # Version of pyLCR
 __version__ = '0.1.0'
 
+import os
+
+from .DataTools import LightCurve
 from .DataTools import getLightCurve
-from .PlottingTools import plotLightCurve
-from .PlottingTools import computeDate
-from .PlottingTools import getCurrentMET
-from .PlottingTools import computeMJD
+from .DataTools import getLightCurves
+from .DataTools import updateLightCurve
+from .DataTools import setRepositoryURL
+from .TimeTools import computeDate
+from .TimeTools import getCurrentMET
+from .TimeTools import getCurrentUTCMET
+from .TimeTools import computeMJD
+from .TimeTools import computeMJDs
+from .TimeTools import computeDates
+from .TimeTools import computeMET
+from .CollectionTools import LightCurveCollection
 from .Sources import sources
+from .Sources import catalog
+from .CacheTools import setCacheOptions
+from .CacheTools import clearCache
+from .NetworkTools import setSessionOptions
+from .EventTools import addListener
+from .EventTools import removeListener
+from .EventTools import setLogLevel
+from .EventTools import logToStdout
+from .EventTools import MetricsRecorder
+from .SchedulerTools import LightCurveMonitor
+from .PeriodogramTools import computePeriodograms
+from .CorrelationTools import computeCrossCorrelations
 
 del DataTools
-del PlottingTools
+del TimeTools
+del CollectionTools
 del Sources
+del CacheTools
+del NetworkTools
+del EventTools
+del SchedulerTools
+del PeriodogramTools
+del CorrelationTools
+
+
+def __getattr__(name):
+
+    # Import the plotting tools, and with them matplotlib, only when they're first used
+    if name in ['plotLightCurve', 'renderLightCurves']:
+        from . import PlottingTools
+        globals()[name] = getattr(PlottingTools, name)
+        return globals()[name]
+
+    # Likewise import pyarrow only when the Arrow tools are first used
+    if name in ['toArrowTable', 'fromArrowTable', 'writeParquet', 'readParquet', 'readParquetTable']:
+        from . import ArrowTools
+        globals()[name] = getattr(ArrowTools, name)
+        return globals()[name]
+
+    # And the mock repository server only when it's first used
+    if name in ['MockRepository', 'generateLightCurveData']:
+        from . import MockTools
+        globals()[name] = getattr(MockTools, name)
+        return globals()[name]
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 
-print("\nThe Fermi-LAT Light Curve Repository Toolkit v%s" % __version__)
-print("Support Contact: Daniel Kocevski (daniel.kocevski@nasa.gov)")
+# Set the PYLCR_QUIET environment variable to suppress the banner
+if not os.environ.get('PYLCR_QUIET'):
+    print("\nThe Fermi-LAT Light Curve Repository Toolkit v%s" % __version__)
+    print("Support Contact: Daniel Kocevski (daniel.kocevski@nasa.gov)")
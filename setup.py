@@ -9,8 +9,11 @@ setup(
     author_email='daniel.kocevski@nasa.gov',
     license='BSD 2-clause',
     packages=['pyLCR'],
-    install_requires=['numpy',                     
+    install_requires=['numpy>=1.20',                   
                       ],
+    extras_require={'fast': ['orjson'],
+                    'arrow': ['pyarrow'],
+                    },
 
     classifiers=[
         'Programming Language :: Python :: 3.10.2',
@@ -0,0 +1,51 @@
+import os
+
+# Suppress the banner before pyLCR is first imported
+os.environ.setdefault('PYLCR_QUIET', '1')
+
+import json
+import pytest
+
+import pyLCR
+from pyLCR import CacheTools
+from pyLCR.MockTools import generateLightCurveData
+from pyLCR.DataTools import _parseLightCurve
+
+##########################################################################################
+
+@pytest.fixture
+def lightCurve():
+    """A synthetic daily light curve created without going through the network
+
+    """
+
+    lightCurve = _parseLightCurve(json.loads(generateLightCurveData(cadence='daily', seed=1)))
+
+    lightCurve.source = '4FGL J1229.0+0202'
+    lightCurve.cadence = 'daily'
+    lightCurve.flux_type = 'photon'
+    lightCurve.index_type = 'fixed'
+    lightCurve.ts_min = 4
+
+    return lightCurve
+
+##########################################################################################
+
+@pytest.fixture
+def repository(tmp_path):
+    """A running MockRepository used by getLightCurve, with an empty cache directory
+
+    """
+
+    directory = CacheTools.cache.directory
+
+    pyLCR.setCacheOptions(directory=str(tmp_path / 'cache'))
+    pyLCR.clearCache()
+
+    with pyLCR.MockRepository(n_bins=500) as repository:
+        pyLCR.setRepositoryURL(repository.url)
+        yield repository
+
+    pyLCR.setRepositoryURL()
+    pyLCR.clearCache()
+    pyLCR.setCacheOptions(directory=directory)
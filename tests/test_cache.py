@@ -0,0 +1,87 @@
+import os
+import time
+
+from pyLCR.CacheTools import CacheWriter
+from pyLCR.CacheTools import LightCurveCache
+from pyLCR.CacheTools import MemoryCache
+
+##########################################################################################
+
+def writeEntry(cache, filename, data=b'{}'):
+    writer = CacheWriter(cache, filename)
+    writer.write(data)
+    writer.commit()
+
+    return cache.get_path(filename)
+
+##########################################################################################
+
+def test_lookup_hit_and_expiry(tmp_path):
+    cache = LightCurveCache(directory=str(tmp_path), ttl={'daily': 100})
+    path = writeEntry(cache, 'source_daily_photon_fixed_tsmin4.json')
+
+    assert cache.lookup('source_daily_photon_fixed_tsmin4.json', 'daily') == path
+    assert cache.lookup('other_daily_photon_fixed_tsmin4.json', 'daily') is None
+
+    # Age the entry beyond its time-to-live
+    expired = time.time() - 200
+    os.utime(path, (expired, expired))
+
+    assert cache.lookup('source_daily_photon_fixed_tsmin4.json', 'daily') is None
+
+
+def test_disabled_cache_misses(tmp_path):
+    cache = LightCurveCache(directory=str(tmp_path), enabled=False)
+    writeEntry(cache, 'source_daily_photon_fixed_tsmin4.json')
+
+    assert cache.lookup('source_daily_photon_fixed_tsmin4.json', 'daily') is None
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = LightCurveCache(directory=str(tmp_path), max_size=None)
+
+    now = time.time()
+    for age, name in enumerate(['new', 'old', 'oldest']):
+        path = writeEntry(cache, name + '_daily_photon_fixed_tsmin4.json', b'x' * 100)
+        os.utime(path, (now - age * 60, now))
+
+    # Files that aren't cache entries are never evicted
+    with open(tmp_path / 'notes.txt', 'wb') as file:
+        file.write(b'x' * 1000)
+
+    cache.max_size = 250
+    cache.evict()
+
+    assert sorted(os.listdir(tmp_path)) == ['new_daily_photon_fixed_tsmin4.json', 'notes.txt', 'old_daily_photon_fixed_tsmin4.json']
+
+
+def test_clear_only_removes_entries(tmp_path):
+    cache = LightCurveCache(directory=str(tmp_path))
+    writeEntry(cache, 'source_weekly_energy_free_tsmin9.json')
+    os.mkdir(tmp_path / 'subdirectory')
+    (tmp_path / 'notes.txt').write_text('keep')
+
+    cache.clear()
+
+    assert sorted(os.listdir(tmp_path)) == ['notes.txt', 'subdirectory']
+
+
+def test_memory_cache_hit_and_expiry():
+    cache = MemoryCache(ttl={'daily': 100})
+
+    assert cache.get('key', 'daily', lambda: ('first', time.time())) == ('first', 'fetched')
+    assert cache.get('key', 'daily', lambda: ('second', time.time())) == ('first', 'memory')
+
+    # Entries expire with the time their value was created rather than the time they were stored
+    cache.clear()
+    assert cache.get('key', 'daily', lambda: ('stale', time.time() - 200)) == ('stale', 'fetched')
+    assert cache.get('key', 'daily', lambda: ('fresh', time.time())) == ('fresh', 'fetched')
+
+
+def test_memory_cache_eviction():
+    cache = MemoryCache(max_entries=2, ttl={'daily': 100})
+
+    for key in ['a', 'b', 'c']:
+        cache.get(key, 'daily', lambda: (key, time.time()))
+
+    assert list(cache.entries) == ['b', 'c']
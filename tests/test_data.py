@@ -0,0 +1,85 @@
+import numpy
+import pytest
+
+import pyLCR
+from pyLCR.DataTools import LCRError
+from pyLCR.DataTools import _columns
+
+##########################################################################################
+
+def test_columns_shapes():
+    assert _columns([]).shape == (0,)
+    assert _columns([], 2).shape == (0, 2)
+
+    values = _columns([1.5, 2, 3])
+    assert values.shape == (3,)
+    assert values.dtype == numpy.float64
+
+    rows = _columns([[1, 2], [3, 4], [5, 6]], 2)
+    assert rows.shape == (3, 2)
+    assert numpy.array_equal(rows[:,1], [2, 4, 6])
+
+    bounds = _columns([[1, 2, 3], [4, 5, 6]], 3)
+    assert bounds.shape == (2, 3)
+
+
+@pytest.mark.parametrize('rows', [[[1, 2], [3, 4, 5]], [[1, 2, 3], [4, 5, 6]], [[1], [2]]])
+def test_columns_wrong_width(rows):
+    with pytest.raises(LCRError):
+        _columns(rows, 2)
+
+
+def test_slice_bounds(lightCurve):
+    tmin = lightCurve.met[10]
+    tmax = lightCurve.met[-10]
+
+    sliced = lightCurve.slice(tmin, tmax)
+
+    # Both bounds are inclusive
+    assert sliced.met[0] == tmin
+    assert sliced.met[-1] == tmax
+    assert len(sliced.met) == len(lightCurve.met) - 19
+
+    for met, full in [(sliced.met_detections, lightCurve.met_detections), (sliced.met_upperlimits, lightCurve.met_upperlimits)]:
+        assert numpy.array_equal(met, full[(full >= tmin) & (full <= tmax)])
+
+    assert len(sliced.flux) == len(sliced.met_detections)
+    assert len(sliced.flux_upper_limits) == len(sliced.met_upperlimits)
+    assert sliced.source == lightCurve.source
+
+
+def test_slice_open_and_empty(lightCurve):
+    assert numpy.array_equal(lightCurve.slice().met, lightCurve.met)
+    assert numpy.array_equal(lightCurve.slice(tmax=lightCurve.met[4]).met, lightCurve.met[:5])
+    assert len(lightCurve.slice(lightCurve.met[-1] + 1).met) == 0
+
+
+def test_slice_mjd(lightCurve):
+    mjds = pyLCR.computeMJDs(lightCurve.met)
+
+    # Bounds between the bins aren't affected by rounding in the conversion
+    sliced = lightCurve.slice((mjds[9] + mjds[10]) / 2, (mjds[20] + mjds[21]) / 2, useMJD=True)
+
+    assert len(sliced.met) == 11
+
+
+def test_getLightCurve(repository):
+    lightCurve = pyLCR.getLightCurve('4FGL J1229.0+0202', cadence='weekly')
+
+    assert isinstance(lightCurve, pyLCR.LightCurve)
+    assert lightCurve.source == '4FGL J1229.0+0202'
+    assert len(lightCurve.met) == 500
+    assert len(lightCurve.met_detections) + len(lightCurve.met_upperlimits) == 500
+
+    # Repeated requests are answered by the caches
+    requests = repository.requests
+    pyLCR.getLightCurve('4FGL J1229.0+0202', cadence='weekly')
+    assert repository.requests == requests
+
+    pyLCR.clearCache()
+    pyLCR.getLightCurve('4FGL J1229.0+0202', cadence='weekly')
+    assert repository.requests == requests + 1
+
+
+def test_getLightCurve_unknown_source(repository):
+    assert pyLCR.getLightCurve('Not a source') is None
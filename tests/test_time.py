@@ -0,0 +1,25 @@
+import numpy
+
+import pyLCR
+from pyLCR.TimeTools import leap_seconds
+
+##########################################################################################
+
+def test_met_mjd_round_trip():
+    # Span the mission in whole seconds, the resolution of the MJDs, including the seconds around each leap second
+    # apart from the leap second itself, which shares its MJD with the following second
+    around = [numpy.array([leap - 2, leap - 1, leap + 1, leap + 2]) for leap in leap_seconds]
+    MET = numpy.concatenate([numpy.linspace(2.4e8, 7.5e8, 1001).round()] + around)
+
+    MJD = pyLCR.computeMJDs(MET)
+
+    assert numpy.allclose(pyLCR.computeMET(MJD), MET, rtol=0, atol=1e-3)
+    assert numpy.allclose(pyLCR.computeMJDs(pyLCR.computeMET(MJD)), MJD, rtol=0, atol=1e-8)
+
+
+def test_scalar_round_trip():
+    MET = 600000000
+
+    assert abs(pyLCR.computeMET(pyLCR.computeMJD(MET)) - MET) < 1e-3
+    assert pyLCR.computeMET(54832.0) == 252460802
+    assert isinstance(pyLCR.computeMET(55000.5), float)
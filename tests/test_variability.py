@@ -0,0 +1,19 @@
+import numpy
+
+from pyLCR.VariabilityTools import lombScargle
+
+##########################################################################################
+
+def test_lombScargle_recovers_period():
+    random = numpy.random.default_rng(3)
+
+    # An irregularly sampled, noisy sinusoid with a 37 day period
+    t = numpy.sort(random.uniform(0, 3000, 800))
+    sigma = numpy.full(len(t), 0.5)
+    y = 2.0 + numpy.sin(2 * numpy.pi * t / 37.0) + random.normal(0, sigma)
+
+    for method in ['fast', 'direct']:
+        frequency, power = lombScargle(t, y, sigma, maximum_frequency=0.2, method=method)
+
+        assert abs(1.0 / frequency[numpy.argmax(power)] - 37.0) < 0.5
+        assert numpy.all((power >= 0) & (power <= 1 + 1e-9))